@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .constants import AUTH_TOKEN_CACHE_KEY_PREFIX, AUTH_TOKEN_CACHE_TIMEOUT
+
+User = get_user_model()
+
+CACHED_USER_FIELDS = ('id', 'is_active', 'is_staff', 'is_superuser')
+
+
+def _token_key(key):
+    return f'{AUTH_TOKEN_CACHE_KEY_PREFIX}:{key}'
+
+
+def _user_key(user_id):
+    return f'{AUTH_TOKEN_CACHE_KEY_PREFIX}:user:{user_id}'
+
+
+def evict_token(key):
+    cache.delete(_token_key(key))
+
+
+def evict_user(user_id):
+    key = cache.get(_user_key(user_id))
+    if key is not None:
+        cache.delete_many([_token_key(key), _user_key(user_id)])
+
+
+def evict_users(user_ids):
+    user_keys = [_user_key(user_id) for user_id in user_ids]
+    token_keys = [_token_key(key)
+                  for key in cache.get_many(user_keys).values()]
+    cache.delete_many(user_keys + token_keys)
+
+
+class CachedUser(SimpleLazyObject):
+    # Идентификатор и флаги берутся из кеша, а полная запись читается
+    # из БД только при обращении к остальным атрибутам.
+
+    def __init__(self, data):
+        super().__init__(lambda: User.objects.get(pk=data['id']))
+        self.__dict__.update(
+            data,
+            pk=data['id'],
+            is_authenticated=True,
+            is_anonymous=False,
+        )
+
+    def __setattr__(self, name, value):
+        self.__dict__.pop(name, None)
+        super().__setattr__(name, value)
+
+    def __bool__(self):
+        return True
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+
+    def authenticate_credentials(self, key):
+        data = cache.get(_token_key(key))
+        if data is not None:
+            return CachedUser(data), Token(key=key, user_id=data['id'])
+
+        user, token = super().authenticate_credentials(key)
+        data = {field: getattr(user, field) for field in CACHED_USER_FIELDS}
+        cache.set_many({_token_key(key): data, _user_key(user.pk): key},
+                       AUTH_TOKEN_CACHE_TIMEOUT)
+        return user, token
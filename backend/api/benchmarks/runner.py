@@ -0,0 +1,76 @@
+import statistics
+import time
+import tracemalloc
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# p99 на сотнях замеров слишком шумный, чтобы ронять по нему прогон.
+COMPARED_METRICS = ('p50_ms', 'p95_ms', 'peak_kib')
+
+
+def run_request(scenario, context):
+    response = scenario(context)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    if response.status_code >= 400:
+        raise RuntimeError(f'{response.status_code}: {response.content!r}')
+    return response
+
+
+def measure(scenario, context, iterations, warmup, memory_iterations):
+    for _ in range(warmup):
+        run_request(scenario, context)
+
+    with CaptureQueriesContext(connection) as queries:
+        run_request(scenario, context)
+    # Журнал запросов очищается сигналом request_started, поэтому
+    # количество снимается до следующих запросов.
+    query_count = len(queries)
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        run_request(scenario, context)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    # tracemalloc замедляет выполнение, поэтому память меряется
+    # отдельным проходом, не влияющим на задержки.
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(memory_iterations):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            run_request(scenario, context)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    percentiles = statistics.quantiles(timings, n=100, method='inclusive')
+    return {
+        'queries': query_count,
+        'p50_ms': round(percentiles[49], 3),
+        'p95_ms': round(percentiles[94], 3),
+        'p99_ms': round(percentiles[98], 3),
+        'peak_kib': round(max(peaks) / 1024, 1),
+    }
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                f"{name}: запросов {previous['queries']} -> "
+                f"{current['queries']}")
+        for metric in COMPARED_METRICS:
+            limit = previous[metric] * (1 + tolerance)
+            if current[metric] > limit:
+                regressions.append(
+                    f'{name}: {metric} {previous[metric]} -> '
+                    f'{current[metric]} (допуск {limit:.3f})')
+    return regressions
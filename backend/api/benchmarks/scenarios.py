@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class BenchmarkContext:
+    # Все объекты выбираются детерминированно, поэтому на одном и том же
+    # наборе данных сценарии повторяют одни и те же запросы.
+
+    def __init__(self):
+        self.user = (User.objects
+                     .annotate(subscriptions_total=Count('subscriptions'),
+                               cart_total=Count('shopping_cart'))
+                     .order_by('-subscriptions_total', '-cart_total', 'id')
+                     .first())
+        self.recipe = Recipe.objects.order_by('-favorites_count', 'id').first()
+        self.other_recipe = (Recipe.objects
+                             .exclude(favorited_by__user=self.user)
+                             .exclude(in_cart__user=self.user)
+                             .order_by('id').first())
+        self.author = (User.objects
+                       .exclude(pk=self.user.pk)
+                       .exclude(subscribers__user=self.user)
+                       .order_by('-recipes_count', 'id').first())
+        token, _ = Token.objects.get_or_create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.anonymous = APIClient()
+
+
+def toggle(client, url):
+    client.post(url)
+    return client.delete(url)
+
+
+SCENARIOS = {
+    'recipe_list': lambda ctx: ctx.client.get('/api/recipes/?limit=6'),
+    'recipe_list_anonymous': lambda ctx: ctx.anonymous.get(
+        '/api/recipes/?limit=6'),
+    'recipe_list_cursor': lambda ctx: ctx.client.get(
+        '/api/recipes/?pagination=cursor&limit=6'),
+    'recipe_search': lambda ctx: ctx.client.get(
+        '/api/recipes/?search=рецепт&limit=6'),
+    'recipe_detail': lambda ctx: ctx.client.get(
+        f'/api/recipes/{ctx.recipe.pk}/'),
+    'ingredient_search': lambda ctx: ctx.client.get(
+        '/api/ingredients/?name=са'),
+    'subscriptions': lambda ctx: ctx.client.get(
+        '/api/users/subscriptions/?recipes_limit=3'),
+    'shopping_list_download': lambda ctx: ctx.client.get(
+        '/api/recipes/download_shopping_cart/'),
+    'favorite_toggle': lambda ctx: toggle(
+        ctx.client, f'/api/recipes/{ctx.other_recipe.pk}/favorite/'),
+    'shopping_cart_toggle': lambda ctx: toggle(
+        ctx.client, f'/api/recipes/{ctx.other_recipe.pk}/shopping_cart/'),
+    'subscribe_toggle': lambda ctx: toggle(
+        ctx.client, f'/api/users/{ctx.author.pk}/subscribe/'),
+}
@@ -0,0 +1,62 @@
+import hashlib
+import json
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+
+from recipes.snapshots import get_cached_version
+from .constants import RECIPES_GENERATION_KEY, USERS_GENERATION_KEY
+from .membership import get_version
+
+
+def get_recipes_generation():
+    return get_cached_version(RECIPES_GENERATION_KEY)
+
+
+def bump_recipes_generation():
+    cache.set(RECIPES_GENERATION_KEY, time.time_ns(), None)
+
+
+def get_users_generation():
+    return get_cached_version(USERS_GENERATION_KEY)
+
+
+def bump_users_generation():
+    cache.set(USERS_GENERATION_KEY, time.time_ns(), None)
+
+
+def make_etag(request, *parts):
+    user = request.user
+    version = get_version(user.pk) if user.is_authenticated else None
+    payload = json.dumps([user.pk, version, *parts], default=str)
+    return quote_etag(hashlib.sha1(payload.encode()).hexdigest())
+
+
+def conditional_get(handler):
+    @wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        validators = self.get_conditional_validators(request, *args,
+                                                     **kwargs)
+        if validators is None:
+            return handler(self, request, *args, **kwargs)
+
+        etag, last_modified = validators
+        if last_modified is not None:
+            last_modified = int(last_modified.timestamp())
+        response = get_conditional_response(
+            request._request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(self, request, *args, **kwargs)
+
+        if response.status_code in (status.HTTP_200_OK,
+                                    status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_vary_headers(response, ['Authorization'])
+        return response
+    return wrapper
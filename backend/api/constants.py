@@ -3,9 +3,73 @@ MIN_COOKING_TIME = 1
 MIN_AMOUNT_INGREDIENT_ERROR = 'Количество должно быть не меньше 1.'
 INVALID_CURRENT_PASSWORD_ERROR = 'Неверный текущий пароль.'
 IMAGE_REQUIRED_ERROR = 'Изображение обязательно.'
+INVALID_IMAGE_ERROR = 'Загрузите корректное изображение.'
+IMAGE_TYPE_ERROR = 'Неподдерживаемый формат изображения.'
+IMAGE_TOO_LARGE_ERROR = 'Размер изображения не должен превышать {max_mb} МБ.'
+IMAGE_DIMENSIONS_ERROR = ('Изображение не должно быть больше '
+                          '{max_side}×{max_side} пикселей.')
 COOKING_TIME_MIN_ERROR = 'Время приготовления должно быть не меньше 1.'
 EMPTY_INGREDIENTS_ERROR = 'Добавьте хотя бы один ингредиент.'
 DUPLICATE_INGREDIENTS_ERROR = 'Ингредиенты не должны повторяться.'
+UNKNOWN_INGREDIENTS_ERROR = 'Ингредиенты не найдены: {ids}.'
+
+BULK_MAX_RECIPES = 100
+BULK_ADDED = 'added'
+BULK_REMOVED = 'removed'
+BULK_ALREADY_ADDED = 'already_added'
+BULK_NOT_ADDED = 'not_added'
+BULK_NOT_FOUND = 'not_found'
 
 PAGE_SIZE = 6
 PAGE_SIZE_QUERY_PARAM = 'limit'
+MAX_PAGE_SIZE = 100
+PAGINATION_MODE_QUERY_PARAM = 'pagination'
+CURSOR_PAGINATION_MODE = 'cursor'
+CURSOR_QUERY_PARAM = 'cursor'
+INVALID_CURSOR_ERROR = 'Некорректный курсор.'
+APPROXIMATE_COUNT_MIN_ROWS = 100000
+COUNT_CACHE_TIMEOUT = 30
+COUNT_CACHE_KEY_PREFIX = 'paginator_count'
+COUNT_EXACT_HEADER = 'X-Count-Exact'
+
+MEMBERSHIP_CACHE_KEY_PREFIX = 'membership'
+MEMBERSHIP_CACHE_TIMEOUT = 60 * 60
+
+AUTH_TOKEN_CACHE_KEY_PREFIX = 'auth_token'
+AUTH_TOKEN_CACHE_TIMEOUT = 5 * 60
+
+SHOPPING_LIST_TITLE = 'Список покупок:'
+SHOPPING_LIST_FILENAME = 'shopping_list'
+SHOPPING_LIST_CSV_HEADER = ('Ингредиент', 'Количество', 'Единица измерения')
+SHOPPING_LIST_CHUNK_SIZE = 2000
+
+RECIPES_GENERATION_KEY = 'recipes_generation'
+USERS_GENERATION_KEY = 'users_generation'
+RESPONSE_CACHE_KEY_PREFIX = 'response'
+RESPONSE_CACHE_HITS_KEY = 'response_cache:hits'
+RESPONSE_CACHE_MISSES_KEY = 'response_cache:misses'
+
+IMAGE_VARIANTS_QUERY_PARAM = 'image_variants'
+IMAGE_VARIANT_WORKERS = 2
+IMAGE_WEBP_MAX_SIZE = (1200, 1200)
+IMAGE_WEBP_QUALITY = 80
+IMAGE_THUMBNAIL_QUALITY = 85
+
+MAX_IMAGE_UPLOAD_SIZE = 5 * 1024 * 1024
+MAX_IMAGE_SIDE = 6000
+MAX_IMAGE_PIXELS = 24_000_000
+IMAGE_DECODE_CHUNK_SIZE = 64 * 1024
+IMAGE_SPOOL_MAX_SIZE = 1024 * 1024
+IMAGE_ALLOWED_TYPES = ('jpg', 'png', 'gif', 'webp')
+
+METRICS_PREFIX = 'foodgram'
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+METRICS_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                            2.5, 5.0)
+METRICS_QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+METRICS_UNMATCHED_ROUTE = 'unmatched'
+METRICS_METHODS = frozenset(
+    ('GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS'))
+METRICS_OTHER_METHOD = 'OTHER'
+
+REPLICA_STICKY_CACHE_KEY_PREFIX = 'replica_sticky'
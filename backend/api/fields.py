@@ -0,0 +1,109 @@
+import base64
+import binascii
+import re
+import tempfile
+import uuid
+
+import filetype
+from django.core.files.uploadedfile import UploadedFile
+from PIL import Image
+from rest_framework import serializers
+
+from .constants import (MAX_IMAGE_UPLOAD_SIZE, MAX_IMAGE_SIDE,
+                        MAX_IMAGE_PIXELS, IMAGE_DECODE_CHUNK_SIZE,
+                        IMAGE_SPOOL_MAX_SIZE, IMAGE_ALLOWED_TYPES,
+                        INVALID_IMAGE_ERROR, IMAGE_TYPE_ERROR,
+                        IMAGE_TOO_LARGE_ERROR, IMAGE_DIMENSIONS_ERROR)
+
+# Заголовка в 262 байта filetype хватает для определения формата.
+HEADER_SIZE = 262
+WHITESPACE = re.compile(r'\s')
+
+
+class StreamingBase64ImageField(serializers.ImageField):
+    EMPTY_VALUES = (None, '', [], (), {})
+
+    def __init__(self, *args, max_size=MAX_IMAGE_UPLOAD_SIZE, **kwargs):
+        self.max_size = max_size
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+        if data in self.EMPTY_VALUES:
+            return None
+        if not isinstance(data, str):
+            raise serializers.ValidationError(INVALID_IMAGE_ERROR)
+
+        # Заголовок data URI отбрасываем срезом по смещению, без split,
+        # чтобы не копировать base64-строку целиком.
+        start = data.find(';base64,')
+        start = 0 if start == -1 else start + len(';base64,')
+        if WHITESPACE.search(data, start):
+            # base64 с переносами строк (MIME) допустим; копию без пробелов
+            # делаем только в этом случае.
+            data = ''.join(data[start:].split())
+            start = 0
+        self.check_declared_size(data, start)
+
+        file = self.decode(data, start)
+        try:
+            kind = self.check_image(file)
+        except serializers.ValidationError:
+            file.close()
+            raise
+
+        upload = UploadedFile(
+            file=file,
+            name=f'{uuid.uuid4()}.{kind.extension}',
+            content_type=kind.mime,
+            size=file.seek(0, 2),
+        )
+        file.seek(0)
+        return serializers.FileField.to_internal_value(self, upload)
+
+    def check_declared_size(self, data, start):
+        encoded_length = len(data) - start
+        padding = data.count('=', max(start, len(data) - 2))
+        if encoded_length * 3 // 4 - padding > self.max_size:
+            raise serializers.ValidationError(IMAGE_TOO_LARGE_ERROR.format(
+                max_mb=self.max_size // (1024 * 1024)))
+
+    def decode(self, data, start):
+        file = tempfile.SpooledTemporaryFile(max_size=IMAGE_SPOOL_MAX_SIZE)
+        # Размер порции кратен 4, поэтому каждая порция декодируется
+        # независимо от соседних.
+        chunk_size = IMAGE_DECODE_CHUNK_SIZE // 4 * 4
+        try:
+            for offset in range(start, len(data), chunk_size):
+                chunk = data[offset:offset + chunk_size]
+                file.write(base64.b64decode(chunk, validate=True))
+        except (binascii.Error, ValueError):
+            file.close()
+            raise serializers.ValidationError(INVALID_IMAGE_ERROR)
+        return file
+
+    def check_image(self, file):
+        if file.tell() > self.max_size:
+            raise serializers.ValidationError(IMAGE_TOO_LARGE_ERROR.format(
+                max_mb=self.max_size // (1024 * 1024)))
+
+        file.seek(0)
+        kind = filetype.guess(file.read(HEADER_SIZE))
+        if kind is None or kind.extension not in IMAGE_ALLOWED_TYPES:
+            raise serializers.ValidationError(IMAGE_TYPE_ERROR)
+
+        file.seek(0)
+        try:
+            # open() читает только заголовок, поэтому размеры проверяются
+            # до того, как Pillow выделит память под пиксели.
+            image = Image.open(file)
+            width, height = image.size
+            if (max(width, height) > MAX_IMAGE_SIDE
+                    or width * height > MAX_IMAGE_PIXELS):
+                raise serializers.ValidationError(
+                    IMAGE_DIMENSIONS_ERROR.format(max_side=MAX_IMAGE_SIDE))
+            image.verify()
+        except serializers.ValidationError:
+            raise
+        except Exception:
+            raise serializers.ValidationError(INVALID_IMAGE_ERROR)
+        return kind
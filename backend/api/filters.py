@@ -1,6 +1,10 @@
 import django_filters
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
 from django_filters import rest_framework as filters
 
+from recipes.constants import RECIPE_SEARCH_CONFIG
 from recipes.models import Recipe, Ingredient
 
 
@@ -19,10 +23,11 @@ class RecipeFilter(filters.FilterSet):
         coerce=coerce_to_bool,
         method='filter_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Recipe
-        fields = ['author', 'is_favorited', 'is_in_shopping_cart']
+        fields = ['author', 'is_favorited', 'is_in_shopping_cart', 'search']
 
     def filter_is_favorited(self, queryset, name, value):
         user = self.request.user
@@ -36,6 +41,17 @@ class RecipeFilter(filters.FilterSet):
             return queryset.filter(in_cart__user=user)
         return queryset
 
+    def filter_search(self, queryset, name, value):
+        query = SearchQuery(value, config=RECIPE_SEARCH_CONFIG,
+                            search_type='websearch')
+        return (queryset
+                .filter(search_vector=query)
+                # ts_rank возвращает real; курсор хранит ранг как double,
+                # и без приведения граница страницы не совпадает сама с собой.
+                .annotate(rank=Cast(SearchRank(F('search_vector'), query),
+                                    FloatField()))
+                .order_by('-rank', '-id'))
+
 
 class IngredientFilter(django_filters.FilterSet):
     name = django_filters.CharFilter(field_name='name',
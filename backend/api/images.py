@@ -0,0 +1,97 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from recipes.constants import RECIPE_THUMBNAIL_SIZE
+from users.constants import AVATAR_THUMBNAIL_SIZE
+from .conditional import bump_recipes_generation
+from .constants import (IMAGE_VARIANT_WORKERS, IMAGE_WEBP_MAX_SIZE,
+                        IMAGE_WEBP_QUALITY, IMAGE_THUMBNAIL_QUALITY)
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZES = {
+    'image': RECIPE_THUMBNAIL_SIZE,
+    'avatar': AVATAR_THUMBNAIL_SIZE,
+}
+
+executor = ThreadPoolExecutor(max_workers=IMAGE_VARIANT_WORKERS,
+                              thread_name_prefix='image-variants')
+
+
+def _save(image, name, image_format, **options):
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def render_variants(name, size):
+    with default_storage.open(name) as file:
+        image = ImageOps.exif_transpose(Image.open(file)).convert('RGB')
+
+    stem = os.path.splitext(name)[0]
+    small = ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+    small_name = _save(small, f'{stem}_small.jpg', 'JPEG',
+                       quality=IMAGE_THUMBNAIL_QUALITY, optimize=True)
+
+    image.thumbnail(IMAGE_WEBP_MAX_SIZE, Image.Resampling.LANCZOS)
+    webp_name = _save(image, f'{stem}.webp', 'WEBP',
+                      quality=IMAGE_WEBP_QUALITY, method=4)
+    return small_name, webp_name
+
+
+def store_variants(model, pk, field, name, small_name, webp_name,
+                   bump=True):
+    updated = model.objects.filter(pk=pk, **{field: name}).update(**{
+        f'{field}_small': small_name,
+        f'{field}_webp': webp_name,
+        'updated_at': timezone.now(),
+    })
+    if updated and bump:
+        bump_recipes_generation()
+    return updated
+
+
+def build_variants(model, pk, field, name):
+    try:
+        small_name, webp_name = render_variants(name, THUMBNAIL_SIZES[field])
+        if not store_variants(model, pk, field, name, small_name, webp_name):
+            # Изображение успели заменить, варианты больше не нужны.
+            delete_files([small_name, webp_name])
+    except Exception:
+        logger.exception('Не удалось создать варианты изображения %s', name)
+    finally:
+        connection.close()
+
+
+def schedule_variants(instance, field):
+    name = getattr(instance, field).name
+    if not name:
+        return
+    transaction.on_commit(lambda: executor.submit(
+        build_variants, instance._meta.model, instance.pk, field, name))
+
+
+def delete_files(names):
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except Exception:
+            logger.exception('Не удалось удалить файл %s', name)
+
+
+def schedule_cleanup(instance, field):
+    # Вызывается до замены изображения: старые файлы удаляются только
+    # после фиксации транзакции, чтобы откат не оставил ссылок в пустоту.
+    names = [getattr(instance, name).name
+             for name in (field, f'{field}_small', f'{field}_webp')]
+    names = [name for name in names if name]
+    if names:
+        transaction.on_commit(lambda: delete_files(names))
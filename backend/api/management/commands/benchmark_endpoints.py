@@ -0,0 +1,114 @@
+import io
+import json
+import platform
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (override_settings, setup_test_environment,
+                               teardown_test_environment)
+
+from api.benchmarks.runner import compare, measure
+from api.benchmarks.scenarios import SCENARIOS, BenchmarkContext
+from recipes.models import Recipe
+
+DATASET = {
+    'users': 500,
+    'recipes': 5000,
+    'favorites': 10000,
+    'cart': 2000,
+    'subscriptions': 2000,
+    'seed': 1,
+}
+
+
+class Command(BaseCommand):
+    help = ('Benchmark hot API endpoints on a seeded test database: '
+            'query counts, latency percentiles and memory')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--memory-iterations', type=int, default=5)
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help='Множитель размера набора данных')
+        parser.add_argument('--output', help='Куда записать результаты JSON')
+        parser.add_argument('--compare', help='JSON с базовыми результатами')
+        parser.add_argument('--tolerance', type=float, default=0.2)
+        parser.add_argument('--keepdb', action='store_true')
+        parser.add_argument('scenarios', nargs='*',
+                            help='Сценарии; по умолчанию все: '
+                                 + ', '.join(SCENARIOS))
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as f:
+                baseline = json.load(f)['scenarios']
+
+        dataset = {
+            key: value if key == 'seed' else int(value * options['scale'])
+            for key, value in DATASET.items()
+        }
+        names = options['scenarios'] or list(SCENARIOS)
+        unknown = set(names) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные сценарии: {", ".join(sorted(unknown))}')
+
+        setup_test_environment(debug=False)
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            # Отдельные кеш и медиа, чтобы прогон не смешивался с данными
+            # разработки и каждый раз начинался с холодного кеша. Реплики
+            # отключены: тестовая копия создаётся только для основной базы.
+            with tempfile.TemporaryDirectory() as media_root, \
+                    override_settings(CACHES={'default': {
+                        'BACKEND': 'django.core.cache.backends.locmem.'
+                                   'LocMemCache'}}, MEDIA_ROOT=media_root,
+                        DATABASE_REPLICAS=[]):
+                results = self.run(dataset, names, options)
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'dataset': dataset,
+                'iterations': options['iterations'],
+                'python': platform.python_version(),
+                'database': connection.vendor,
+            },
+            'scenarios': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+        if baseline is not None:
+            regressions = compare(results, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError('Регрессии:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def run(self, dataset, names, options):
+        if not (options['keepdb'] and Recipe.objects.exists()):
+            call_command('generate_load_data', **dataset, stdout=io.StringIO())
+        context = BenchmarkContext()
+
+        self.stdout.write(f"{'scenario':<26}{'queries':>8}{'p50, ms':>10}"
+                          f"{'p95, ms':>10}{'p99, ms':>10}{'peak, KiB':>12}")
+        results = {}
+        for name in names:
+            result = measure(SCENARIOS[name], context, options['iterations'],
+                             options['warmup'], options['memory_iterations'])
+            results[name] = result
+            self.stdout.write(
+                f"{name:<26}{result['queries']:>8}{result['p50_ms']:>10}"
+                f"{result['p95_ms']:>10}{result['p99_ms']:>10}"
+                f"{result['peak_kib']:>12}")
+        return results
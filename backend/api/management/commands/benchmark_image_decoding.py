@@ -0,0 +1,55 @@
+import base64
+import io
+import random
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+
+from api.fields import StreamingBase64ImageField
+
+
+class Command(BaseCommand):
+    help = 'Compare peak memory of buffered and streaming Base64 decoding'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--side', type=int, default=2000)
+        parser.add_argument('--iterations', type=int, default=5)
+
+    def make_payload(self, side):
+        # Шум плохо сжимается, поэтому файл получается честно большим.
+        noise = random.Random(side).randbytes(side * side * 3)
+        image = Image.frombytes('RGB', (side, side), noise)
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG')
+        encoded = base64.b64encode(buffer.getvalue()).decode()
+        return f'data:image/png;base64,{encoded}'
+
+    def measure(self, field, payload, iterations):
+        peaks = []
+        started = time.perf_counter()
+        for _ in range(iterations):
+            tracemalloc.start()
+            upload = field.to_internal_value(payload)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            upload.close()
+        elapsed = time.perf_counter() - started
+        return max(peaks) / (1024 * 1024), elapsed / iterations * 1000
+
+    def handle(self, *args, **options):
+        payload = self.make_payload(options['side'])
+        self.stdout.write(
+            f'payload: {len(payload) / (1024 * 1024):.1f} MiB of base64')
+        self.stdout.write(f"{'field':<30}{'peak, MiB':>12}{'time, ms':>12}")
+        fields = (
+            ('Base64ImageField', Base64ImageField()),
+            ('StreamingBase64ImageField',
+             StreamingBase64ImageField(max_size=len(payload))),
+        )
+        for name, field in fields:
+            peak, duration = self.measure(field, payload,
+                                          options['iterations'])
+            self.stdout.write(f'{name:<30}{peak:>12.1f}{duration:>12.1f}')
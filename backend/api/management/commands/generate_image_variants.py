@@ -0,0 +1,61 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api.conditional import bump_recipes_generation
+from api.images import THUMBNAIL_SIZES, render_variants, store_variants
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnail and WebP variants for recipe images and avatars'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count())
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--all', action='store_true',
+                            help='Пересоздать варианты и для изображений, '
+                                 'у которых они уже есть')
+
+    def get_jobs(self, model, field, regenerate):
+        queryset = model.objects.exclude(**{field: ''}).exclude(
+            **{f'{field}__isnull': True})
+        if not regenerate:
+            queryset = queryset.filter(**{f'{field}_small__isnull': True})
+        return list(queryset.values_list('pk', field))
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        done = failed = 0
+
+        for model, field in ((Recipe, 'image'), (User, 'avatar')):
+            jobs = self.get_jobs(model, field, options['all'])
+            connections.close_all()
+            with ProcessPoolExecutor(options['processes']) as pool:
+                for start in range(0, len(jobs), batch_size):
+                    futures = {
+                        pool.submit(render_variants, name,
+                                    THUMBNAIL_SIZES[field]): (pk, name)
+                        for pk, name in jobs[start:start + batch_size]
+                    }
+                    for future in as_completed(futures):
+                        pk, name = futures[future]
+                        try:
+                            small_name, webp_name = future.result()
+                        except Exception as error:
+                            failed += 1
+                            self.stderr.write(f'{name}: {error}')
+                            continue
+                        store_variants(model, pk, field, name, small_name,
+                                       webp_name, bump=False)
+                        done += 1
+                    self.stdout.write(f'Обработано изображений: {done}')
+
+        bump_recipes_generation()
+        self.stdout.write(self.style.SUCCESS(
+            f'Варианты созданы: {done}, ошибок: {failed}'))
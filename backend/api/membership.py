@@ -0,0 +1,88 @@
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from recipes.models import Favorite, ShoppingCart
+from recipes.snapshots import bump_cached_version, get_cached_version
+from users.models import Subscription
+from .constants import MEMBERSHIP_CACHE_KEY_PREFIX, MEMBERSHIP_CACHE_TIMEOUT
+
+FAVORITES = 'favorites'
+SHOPPING_CART = 'shopping_cart'
+SUBSCRIPTIONS = 'subscriptions'
+
+EMPTY_MEMBERSHIP = {
+    'version': None,
+    FAVORITES: frozenset(),
+    SHOPPING_CART: frozenset(),
+    SUBSCRIPTIONS: frozenset(),
+}
+
+
+def _snapshot_key(user_id):
+    return f'{MEMBERSHIP_CACHE_KEY_PREFIX}:{user_id}'
+
+
+def _version_key(user_id):
+    return f'{MEMBERSHIP_CACHE_KEY_PREFIX}:{user_id}:version'
+
+
+def get_version(user_id):
+    return get_cached_version(_version_key(user_id))
+
+
+def _bump_version(user_id):
+    return bump_cached_version(_version_key(user_id))
+
+
+def reset_memberships(user_ids):
+    # Сброс ключа версии безопасен: новая версия берётся из часов.
+    cache.delete_many([key for user_id in user_ids
+                       for key in (_snapshot_key(user_id),
+                                   _version_key(user_id))])
+
+
+def _load(user_id, version):
+    # Снимок кешируется под текущей версией, поэтому читается из основной
+    # базы: отстающая реплика закрепила бы в нём старые отметки.
+    def ids(model, field):
+        return set(model.objects.using(DEFAULT_DB_ALIAS)
+                   .filter(user_id=user_id).values_list(field, flat=True))
+
+    return {
+        'version': version,
+        FAVORITES: ids(Favorite, 'recipe_id'),
+        SHOPPING_CART: ids(ShoppingCart, 'recipe_id'),
+        SUBSCRIPTIONS: ids(Subscription, 'author_id'),
+    }
+
+
+def get_membership(request):
+    user = request.user
+    if not user.is_authenticated:
+        return EMPTY_MEMBERSHIP
+
+    membership = getattr(request, '_membership', None)
+    if membership is not None:
+        return membership
+
+    version = get_version(user.pk)
+    membership = cache.get(_snapshot_key(user.pk))
+    if membership is None or membership['version'] != version:
+        membership = _load(user.pk, version)
+        cache.set(_snapshot_key(user.pk), membership,
+                  MEMBERSHIP_CACHE_TIMEOUT)
+    request._membership = membership
+    return membership
+
+
+def update_membership(user_id, kind, added=(), removed=()):
+    version = _bump_version(user_id)
+    key = _snapshot_key(user_id)
+    membership = cache.get(key)
+    if membership is None or membership['version'] != version - 1:
+        cache.delete(key)
+        return
+
+    membership[kind] = (membership[kind] | set(added)) - set(removed)
+    membership['version'] = version
+    cache.set(key, membership, MEMBERSHIP_CACHE_TIMEOUT)
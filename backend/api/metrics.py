@@ -0,0 +1,98 @@
+import bisect
+import threading
+
+from .constants import (METRICS_DURATION_BUCKETS, METRICS_PREFIX,
+                        METRICS_QUERY_BUCKETS)
+from .response_cache import get_response_cache_stats
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        cumulative = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            cumulative += count
+            yield bound, cumulative
+
+
+class MetricsRegistry:
+    # Метрики живут в памяти процесса; при нескольких воркерах Prometheus
+    # опрашивает каждый из них и суммирует ряды сам.
+    METRICS = (
+        ('request_duration_seconds', 'Время обработки запроса',
+         METRICS_DURATION_BUCKETS),
+        ('db_duration_seconds', 'Время SQL-запросов в запросе',
+         METRICS_DURATION_BUCKETS),
+        ('db_queries', 'Число SQL-запросов в запросе',
+         METRICS_QUERY_BUCKETS),
+    )
+
+    def __init__(self, prefix=METRICS_PREFIX):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._responses = {}
+
+    def observe(self, route, method, status, duration, timer):
+        values = (duration, timer.db, timer.queries)
+        with self._lock:
+            for (name, _, buckets), value in zip(self.METRICS, values):
+                key = (name, route, method)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(buckets)
+                histogram.observe(value)
+            key = (route, method, status)
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def render(self):
+        with self._lock:
+            histograms = {
+                key: (histogram.sum, histogram.count,
+                      list(histogram.samples()))
+                for key, histogram in self._histograms.items()
+            }
+            responses = dict(self._responses)
+
+        lines = []
+        for name, description, _ in self.METRICS:
+            metric = f'{self.prefix}_{name}'
+            lines += [f'# HELP {metric} {description}',
+                      f'# TYPE {metric} histogram']
+            for (key_name, route, method), (total, count, samples) in sorted(
+                    histograms.items()):
+                if key_name != name:
+                    continue
+                labels = f'route="{route}",method="{method}"'
+                lines += [f'{metric}_bucket{{{labels},le="{bound}"}} {value}'
+                          for bound, value in samples]
+                lines += [f'{metric}_sum{{{labels}}} {total}',
+                          f'{metric}_count{{{labels}}} {count}']
+
+        metric = f'{self.prefix}_responses_total'
+        lines += [f'# HELP {metric} Ответы по маршрутам и статусам',
+                  f'# TYPE {metric} counter']
+        lines += [
+            f'{metric}{{route="{route}",method="{method}",'
+            f'status="{status}"}} {count}'
+            for (route, method, status), count in sorted(responses.items())
+        ]
+
+        for name, value in get_response_cache_stats().items():
+            metric = f'{self.prefix}_response_cache_{name}_total'
+            lines += [f'# TYPE {metric} counter', f'{metric} {value}']
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
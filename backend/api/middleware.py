@@ -0,0 +1,62 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .constants import (METRICS_METHODS, METRICS_OTHER_METHOD,
+                        METRICS_UNMATCHED_ROUTE)
+from .metrics import registry
+from .query_inspector import QueryInspector
+from .timing import RequestTimer
+
+
+def wrap_connections(stack, wrapper):
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(wrapper))
+
+
+class ServerTimingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = RequestTimer()
+        request.timer = timer
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            wrap_connections(stack, timer)
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        response['Server-Timing'] = timer.header(duration)
+        match = request.resolver_match
+        route = (match.url_name if match and match.url_name
+                 else METRICS_UNMATCHED_ROUTE)
+        # Метод приходит от клиента, поэтому число рядов ограничено
+        # известными методами.
+        method = (request.method if request.method in METRICS_METHODS
+                  else METRICS_OTHER_METHOD)
+        registry.observe(route, method, response.status_code, duration,
+                         timer)
+        return response
+
+
+class QueryInspectorMiddleware:
+    # Настройка читается на каждом запросе, чтобы тесты могли включать
+    # строгий режим через override_settings.
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_INSPECTOR_ENABLED:
+            return self.get_response(request)
+
+        inspector = QueryInspector(request)
+        with ExitStack() as stack:
+            wrap_connections(stack, inspector)
+            response = self.get_response(request)
+        inspector.check_budget()
+        return response
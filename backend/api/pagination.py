@@ -1,8 +1,227 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import hashlib
+import json
+from functools import partial, reduce
 
-from .constants import PAGE_SIZE, PAGE_SIZE_QUERY_PARAM
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination, PageNumberPagination,
+                                       _positive_int)
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .constants import (PAGE_SIZE, PAGE_SIZE_QUERY_PARAM, MAX_PAGE_SIZE,
+                        PAGINATION_MODE_QUERY_PARAM, CURSOR_PAGINATION_MODE,
+                        CURSOR_QUERY_PARAM, INVALID_CURSOR_ERROR,
+                        APPROXIMATE_COUNT_MIN_ROWS, COUNT_CACHE_TIMEOUT,
+                        COUNT_CACHE_KEY_PREFIX, COUNT_EXACT_HEADER)
+
+
+class CountingPaginator(Paginator):
+
+    def __init__(self, *args, count_cache_key=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_cache_key = count_cache_key
+        self.count_is_exact = True
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = queryset.query
+        if not (query.where or query.distinct or query.group_by
+                or query.combinator):
+            # Без фильтров число строк одно на всю таблицу, поэтому ключ
+            # общий для всех запросов к ней.
+            key = f'{COUNT_CACHE_KEY_PREFIX}:{queryset.model._meta.db_table}'
+            count, self.count_is_exact = self.cached(key,
+                                                     self.count_table_rows)
+            return count
+        return self.cached(self.count_cache_key, queryset.count)
+
+    def cached(self, key, compute):
+        if self.count_cache_key is None:
+            return compute()
+        return cache.get_or_set(key, compute, COUNT_CACHE_TIMEOUT)
+
+    def count_table_rows(self):
+        queryset = self.object_list
+        estimate = self.estimate_table_rows(queryset)
+        if estimate >= APPROXIMATE_COUNT_MIN_ROWS:
+            return estimate, False
+        return queryset.count(), True
+
+    def estimate_table_rows(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        return row[0] if row else 0
 
 
 class LimitPageNumberPagination(PageNumberPagination):
     page_size_query_param = PAGE_SIZE_QUERY_PARAM
     page_size = PAGE_SIZE
+    max_page_size = MAX_PAGE_SIZE
+    count_ignored_params = (PAGE_SIZE_QUERY_PARAM, 'page')
+
+    @property
+    def django_paginator_class(self):
+        return partial(CountingPaginator,
+                       count_cache_key=self.count_cache_key)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_cache_key = self.get_count_cache_key(request)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response[COUNT_EXACT_HEADER] = str(
+            self.page.paginator.count_is_exact).lower()
+        return response
+
+    def get_count_cache_key(self, request):
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            if key not in self.count_ignored_params
+            for value in values
+        )
+        user_id = request.user.pk if request.user.is_authenticated else None
+        raw_key = json.dumps([request.path, user_id, params])
+        digest = hashlib.md5(raw_key.encode()).hexdigest()
+        return f'{COUNT_CACHE_KEY_PREFIX}:{digest}'
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = CURSOR_QUERY_PARAM
+    page_size_query_param = PAGE_SIZE_QUERY_PARAM
+    page_size = PAGE_SIZE
+    max_page_size = MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        self.key, descending = self.get_ordering(queryset)
+        lookup = 'lt' if descending else 'gt'
+        prefix = '-' if descending else ''
+
+        if self.key == 'id':
+            queryset = queryset.order_by(f'{prefix}id')
+        else:
+            queryset = queryset.order_by(f'{prefix}{self.key}',
+                                         f'{prefix}id')
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            value, last_id = cursor
+            value = self.coerce_cursor_value(queryset, value)
+            if self.key == 'id':
+                queryset = queryset.filter(**{f'id__{lookup}': last_id})
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{self.key}__{lookup}': value})
+                    | Q(**{self.key: value, f'id__{lookup}': last_id})
+                )
+
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_ordering(self, queryset):
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        field = ordering[0] if ordering else '-id'
+        if not isinstance(field, str):
+            field = '-id'
+        field = 'id' if field.lstrip('-') == 'pk' else field
+        return field.lstrip('-'), field.startswith('-')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        value = reduce(getattr, self.key.split('__'), last)
+        value = getattr(value, 'pk', value)
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(value, last.pk)
+        )
+
+    def encode_cursor(self, value, last_id):
+        payload = json.dumps([value, last_id], default=str)
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def coerce_cursor_value(self, queryset, value):
+        # Значение из курсора приводится к типу поля сортировки, чтобы
+        # подделанный курсор не ломал построение фильтра.
+        if self.key == 'id':
+            return value
+        field = queryset.query.clone().resolve_ref(self.key).output_field
+        try:
+            value = field.to_python(value)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(INVALID_CURSOR_ERROR)
+        if value is None:
+            raise NotFound(INVALID_CURSOR_ERROR)
+        return value
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            value, last_id = json.loads(base64.urlsafe_b64decode(encoded))
+            return value, int(last_id)
+        except (TypeError, ValueError):
+            raise NotFound(INVALID_CURSOR_ERROR)
+
+
+class FeedPagination(LimitPageNumberPagination):
+    keyset_pagination_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = self.keyset_pagination_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(PAGINATION_MODE_QUERY_PARAM)
+            == CURSOR_PAGINATION_MODE
+            or CURSOR_QUERY_PARAM in request.query_params
+        )
@@ -0,0 +1,111 @@
+import logging
+import os
+import re
+import sys
+import time
+import traceback
+
+from django.conf import settings
+from rest_framework.fields import Field
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_RULES = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'%s|\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(?+)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+# Кадры обёрток вокруг execute ничего не говорят о месте запроса.
+WRAPPER_FILES = {
+    os.path.join(os.path.dirname(__file__), name)
+    for name in ('middleware.py', 'query_inspector.py', 'timing.py')
+}
+
+
+class QueryInspectionError(Exception):
+    pass
+
+
+def fingerprint(sql):
+    for pattern, replacement in FINGERPRINT_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def current_serializer_field():
+    # Ближайший по стеку кадр, где self — поле сериализатора с именем:
+    # это поле, при заполнении которого выполнился запрос.
+    frame = sys._getframe(1)
+    while frame is not None:
+        field = frame.f_locals.get('self')
+        if isinstance(field, Field) and field.field_name:
+            return f'{type(field.parent).__name__}.{field.field_name}'
+        frame = frame.f_back
+    return None
+
+
+def project_stack():
+    base_dir = str(settings.BASE_DIR)
+    frames = [frame for frame in traceback.extract_stack()
+              if frame.filename.startswith(base_dir)
+              and frame.filename not in WRAPPER_FILES
+              and 'site-packages' not in frame.filename]
+    return ''.join(traceback.format_list(frames))
+
+
+class QueryInspector:
+
+    def __init__(self, request):
+        self.request = request
+        self.repeat_threshold = settings.QUERY_INSPECTOR_REPEAT_THRESHOLD
+        self.slow_query = settings.QUERY_INSPECTOR_SLOW_QUERY_MS / 1000
+        self.strict = settings.QUERY_INSPECTOR_STRICT
+        self.counts = {}
+        self.total = 0
+        self.failed = False
+
+    @property
+    def route(self):
+        match = self.request.resolver_match
+        return match.url_name if match and match.url_name else None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - started
+
+        self.total += 1
+        key = fingerprint(sql)
+        count = self.counts[key] = self.counts.get(key, 0) + 1
+        # Сообщение выдаётся один раз, при превышении порога.
+        if count == self.repeat_threshold + 1 and not self.is_allowed(key):
+            self.report(f'Запрос повторён более {self.repeat_threshold} раз',
+                        key)
+        if duration > self.slow_query:
+            self.report(f'Медленный запрос: {duration * 1000:.0f} мс', key)
+        return result
+
+    def is_allowed(self, key):
+        allowed = settings.QUERY_INSPECTOR_ALLOWLIST.get(self.route, ())
+        return any(part == '*' or part in key for part in allowed)
+
+    def check_budget(self):
+        if self.failed:
+            return
+        budget = settings.QUERY_INSPECTOR_BUDGETS.get(self.route)
+        if budget is not None and self.total > budget:
+            self.report(f'Превышен бюджет запросов: {self.total} > {budget}')
+
+    def report(self, problem, key=None):
+        message = (f'{problem}\n'
+                   f'Маршрут: {self.route} '
+                   f'({self.request.method} {self.request.path})')
+        if key is not None:
+            message += (f'\nПоле: {current_serializer_field() or "-"}'
+                        f'\nSQL: {key}\n{project_stack()}')
+        if self.strict:
+            self.failed = True
+            raise QueryInspectionError(message)
+        logger.warning(message)
@@ -0,0 +1,61 @@
+import csv
+import json
+
+from rest_framework import renderers
+
+from .constants import SHOPPING_LIST_TITLE, SHOPPING_LIST_CSV_HEADER
+from .timing import TimedRendererMixin
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+class ShoppingListTextRenderer(renderers.BaseRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            data = '\n'.join(f'{key}: {value}' for key, value in data.items())
+        return str(data).encode(self.charset)
+
+    def stream(self, items):
+        yield f'{SHOPPING_LIST_TITLE}\n'
+        for item in items:
+            yield f"\n{item['name']} – {item['total_amount']} {item['unit']}"
+
+
+class ShoppingListCSVRenderer(ShoppingListTextRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, items):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(SHOPPING_LIST_CSV_HEADER)
+        for item in items:
+            yield writer.writerow(
+                (item['name'], item['total_amount'], item['unit']))
+
+
+class ShoppingListJSONRenderer(renderers.JSONRenderer):
+    charset = 'utf-8'
+
+    def stream(self, items):
+        yield '['
+        separator = ''
+        for item in items:
+            yield separator + json.dumps(item, ensure_ascii=False)
+            separator = ', '
+        yield ']'
+
+
+class TimedJSONRenderer(TimedRendererMixin, renderers.JSONRenderer):
+    pass
+
+
+class TimedBrowsableAPIRenderer(TimedRendererMixin,
+                                renderers.BrowsableAPIRenderer):
+    pass
@@ -0,0 +1,74 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+from .constants import REPLICA_STICKY_CACHE_KEY_PREFIX
+
+# Псевдоним реплики для чтений текущего запроса; None — читать из основной.
+read_alias = ContextVar('read_alias', default=None)
+
+
+def _sticky_key(user_id):
+    return f'{REPLICA_STICKY_CACHE_KEY_PREFIX}:{user_id}'
+
+
+def stick_to_primary(user_id):
+    cache.set(_sticky_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_sticky(user):
+    return user.is_authenticated and cache.get(_sticky_key(user.pk), False)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaReadMixin:
+    # Безопасные запросы читают из случайной реплики, кроме пользователей,
+    # которые только что что-то изменили: они видят основную базу, пока
+    # реплика не догонит запись.
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (settings.DATABASE_REPLICAS
+                and request.method in SAFE_METHODS
+                and not is_sticky(request.user)):
+            self.read_alias_token = read_alias.set(
+                random.choice(settings.DATABASE_REPLICAS))
+
+    def dispatch(self, request, *args, **kwargs):
+        # Сброс в finally: необработанное исключение минует
+        # finalize_response, а псевдоним остался бы у потока навсегда.
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            token = getattr(self, 'read_alias_token', None)
+            if token is not None:
+                read_alias.reset(token)
+                self.read_alias_token = None
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (request.method not in SAFE_METHODS
+                and request.user.is_authenticated
+                and response.status_code < 400):
+            stick_to_primary(request.user.pk)
+        return super().finalize_response(request, response, *args, **kwargs)
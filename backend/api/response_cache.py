@@ -0,0 +1,83 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework import status
+
+from .conditional import get_recipes_generation
+from .constants import (RESPONSE_CACHE_KEY_PREFIX, RESPONSE_CACHE_HITS_KEY,
+                        RESPONSE_CACHE_MISSES_KEY)
+from .replicas import read_alias
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def get_response_cache_stats():
+    return {
+        'hits': cache.get(RESPONSE_CACHE_HITS_KEY, 0),
+        'misses': cache.get(RESPONSE_CACHE_MISSES_KEY, 0),
+    }
+
+
+def get_cache_key(request):
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    )
+    # В ответах есть абсолютные ссылки, поэтому схема и хост входят в ключ.
+    raw_key = json.dumps([request.build_absolute_uri(request.path),
+                          request.accepted_media_type, params])
+    digest = hashlib.md5(raw_key.encode()).hexdigest()
+    return (f'{RESPONSE_CACHE_KEY_PREFIX}:{get_recipes_generation()}:'
+            f'{digest}')
+
+
+def cache_anonymous_response(handler):
+    @wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return handler(self, request, *args, **kwargs)
+
+        key = get_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            _incr(RESPONSE_CACHE_HITS_KEY)
+            content, headers = cached
+            response = HttpResponse(content, headers=headers)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _incr(RESPONSE_CACHE_MISSES_KEY)
+        # Реплика может ещё не видеть запись, сменившую поколение, и тогда
+        # в кеш под новым ключом попали бы старые данные. Поэтому ответ,
+        # который будет сохранён, собирается по основной базе.
+        token = read_alias.set(None)
+        try:
+            response = handler(self, request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+            response.accepted_renderer = request.accepted_renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = self.get_renderer_context()
+            response.render()
+        finally:
+            read_alias.reset(token)
+        if len(response.content) <= settings.RESPONSE_CACHE_MAX_ENTRY_SIZE:
+            # Заголовки сохраняются вместе с телом, чтобы попадание
+            # в кеш отвечало так же, как исходный ответ.
+            cache.set(key, (response.content, dict(response.headers)),
+                      settings.RESPONSE_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+    return wrapper
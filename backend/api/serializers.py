@@ -4,38 +4,60 @@ from djoser.serializers import (UserCreateSerializer
                                 UserSerializer as BaseUserSerializer)
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from drf_extra_fields.fields import Base64ImageField
 
 from recipes.models import (Recipe, Ingredient, RecipeIngredient)
+from .membership import (get_membership, FAVORITES, SHOPPING_CART,
+                         SUBSCRIPTIONS)
+from .fields import StreamingBase64ImageField
+from .images import schedule_cleanup, schedule_variants
 from .constants import (
     MIN_INGREDIENT_AMOUNT, MIN_AMOUNT_INGREDIENT_ERROR,
     INVALID_CURRENT_PASSWORD_ERROR, IMAGE_REQUIRED_ERROR,
     COOKING_TIME_MIN_ERROR, EMPTY_INGREDIENTS_ERROR,
-    DUPLICATE_INGREDIENTS_ERROR, MIN_COOKING_TIME
+    DUPLICATE_INGREDIENTS_ERROR, MIN_COOKING_TIME,
+    UNKNOWN_INGREDIENTS_ERROR, IMAGE_VARIANTS_QUERY_PARAM, BULK_MAX_RECIPES
 )
 
 User = get_user_model()
 
 
-class UserSerializer(BaseUserSerializer):
+class ImageVariantsMixin:
+    variant_fields = ()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if not (request and request.query_params.get(
+                IMAGE_VARIANTS_QUERY_PARAM) == '1'):
+            for name in self.variant_fields:
+                fields.pop(name, None)
+        return fields
+
+
+class UserSerializer(ImageVariantsMixin, BaseUserSerializer):
     is_subscribed = serializers.SerializerMethodField()
     avatar = Base64ImageField()
+    avatar_small = serializers.ImageField(read_only=True)
+    avatar_webp = serializers.ImageField(read_only=True)
+    variant_fields = ('avatar_small', 'avatar_webp')
 
     class Meta(BaseUserSerializer.Meta):
         model = User
         fields = (
             'id', 'email', 'username', 'first_name',
-            'last_name', 'avatar', 'is_subscribed'
+            'last_name', 'avatar', 'is_subscribed',
+            'avatar_small', 'avatar_webp'
         )
 
     def get_is_subscribed(self, obj):
-        user = self.context.get('request').user
-        return not user.is_anonymous and (user.subscriptions
-                                          .filter(author=obj).exists())
+        membership = get_membership(self.context.get('request'))
+        return obj.pk in membership[SUBSCRIPTIONS]
 
 
 class AvatarUploadSerializer(serializers.ModelSerializer):
-    avatar = Base64ImageField(required=True)
+    avatar = StreamingBase64ImageField(required=True)
 
     class Meta:
         model = User
@@ -66,8 +88,7 @@ class SetPasswordSerializer(serializers.Serializer):
 
 class SubscriptionSerializer(UserSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(source='recipes.count',
-                                             read_only=True)
+    recipes_count = serializers.ReadOnlyField()
 
     class Meta(UserSerializer.Meta):
         model = User
@@ -75,11 +96,14 @@ class SubscriptionSerializer(UserSerializer):
 
     def get_recipes(self, obj):
         request = self.context.get('request')
-        recipes_limit = request.query_params.get('recipes_limit')
-        recipes = obj.recipes.all()
+        if hasattr(obj, 'short_recipes'):
+            recipes = obj.short_recipes
+        else:
+            recipes_limit = request.query_params.get('recipes_limit')
+            recipes = obj.recipes.all()
 
-        if recipes_limit and recipes_limit.isdigit():
-            recipes = recipes[:int(recipes_limit)]
+            if recipes_limit and recipes_limit.isdigit():
+                recipes = recipes[:int(recipes_limit)]
 
         return RecipeShortSerializer(
             recipes,
@@ -89,7 +113,7 @@ class SubscriptionSerializer(UserSerializer):
 
 
 class RecipeIngredientSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.ReadOnlyField(source='ingredient_id')
     name = serializers.ReadOnlyField(source='ingredient.name')
     measurement_unit = serializers.ReadOnlyField(
         source='ingredient.measurement_unit')
@@ -100,39 +124,61 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ['name', 'measurement_unit']
 
 
-class RecipeReadSerializer(serializers.ModelSerializer):
+class RecipeReadSerializer(ImageVariantsMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     ingredients = RecipeIngredientSerializer(
         source='recipe_ingredients', many=True, read_only=True)
     image = serializers.ImageField()
+    image_small = serializers.ImageField(read_only=True)
+    image_webp = serializers.ImageField(read_only=True)
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    variant_fields = ('image_small', 'image_webp')
 
     class Meta:
         model = Recipe
         fields = [
             'id', 'author', 'name', 'image', 'text',
             'cooking_time', 'ingredients',
-            'is_favorited', 'is_in_shopping_cart'
+            'is_favorited', 'is_in_shopping_cart',
+            'image_small', 'image_webp'
         ]
 
     def get_is_favorited(self, obj):
-        user = self.context['request'].user
-        return user.is_authenticated and (obj.favorited_by
-                                          .filter(user=user).exists())
+        membership = get_membership(self.context['request'])
+        return obj.pk in membership[FAVORITES]
 
     def get_is_in_shopping_cart(self, obj):
-        user = self.context['request'].user
-        return user.is_authenticated and (obj.in_cart
-                                          .filter(user=user).exists())
+        membership = get_membership(self.context['request'])
+        return obj.pk in membership[SHOPPING_CART]
+
+
+class IngredientAmountListSerializer(serializers.ListSerializer):
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        ids = [item['id'] for item in items]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError(DUPLICATE_INGREDIENTS_ERROR)
+
+        ingredients = Ingredient.objects.in_bulk(ids)
+        unknown = [pk for pk in ids if pk not in ingredients]
+        if unknown:
+            raise serializers.ValidationError(UNKNOWN_INGREDIENTS_ERROR.format(
+                ids=', '.join(map(str, unknown))))
+
+        for item in items:
+            item['id'] = ingredients[item['id']]
+        return items
 
 
 class IngredientAmountSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField(min_value=1)
 
     class Meta:
         model = RecipeIngredient
         fields = ['id', 'amount']
+        list_serializer_class = IngredientAmountListSerializer
 
     def validate_amount(self, value):
         if value < MIN_INGREDIENT_AMOUNT:
@@ -142,7 +188,7 @@ class IngredientAmountSerializer(serializers.ModelSerializer):
 
 class RecipeWriteSerializer(serializers.ModelSerializer):
     ingredients = IngredientAmountSerializer(many=True)
-    image = Base64ImageField()
+    image = StreamingBase64ImageField()
     author = UserSerializer(read_only=True)
 
     class Meta:
@@ -174,55 +220,95 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
                     'ingredients': EMPTY_INGREDIENTS_ERROR
                 })
 
-            seen = set()
-            for ingredient in ingredients:
-                ing_id = ingredient['id'].id
-                if ing_id in seen:
-                    raise serializers.ValidationError({
-                        'ingredients': DUPLICATE_INGREDIENTS_ERROR
-                    })
-                seen.add(ing_id)
-
         return attrs
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop('ingredients')
         author = self.context['request'].user
         recipe = super().create({**validated_data, 'author': author})
-        self._save_ingredients(recipe, ingredients_data)
+        rows = [
+            RecipeIngredient(recipe=recipe, ingredient=item['id'],
+                             amount=item['amount'])
+            for item in ingredients_data
+        ]
+        RecipeIngredient.objects.bulk_create(rows)
+        self.ingredient_rows = rows
+        schedule_variants(recipe, 'image')
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients_data = validated_data.pop('ingredients')
+        image_changed = 'image' in validated_data
+        if image_changed:
+            schedule_cleanup(instance, 'image')
+            validated_data.update(image_small=None, image_webp=None)
         instance = super().update(instance, validated_data)
-        instance.recipe_ingredients.all().delete()
-        self._save_ingredients(instance, ingredients_data)
+        self.ingredient_rows = self._update_ingredients(instance,
+                                                        ingredients_data)
+        if image_changed:
+            schedule_variants(instance, 'image')
         return instance
 
-    def _save_ingredients(self, recipe, ingredients_data):
-        ingredient_instances = [
-            RecipeIngredient(
-                recipe=recipe,
-                ingredient=item['id'],
-                amount=item['amount']
-            ) for item in ingredients_data
-        ]
-
-        RecipeIngredient.objects.bulk_create(ingredient_instances)
+    def _update_ingredients(self, recipe, ingredients_data):
+        current = {row.ingredient_id: row
+                   for row in recipe.recipe_ingredients.all()}
+        rows = []
+        changed = []
+        for item in ingredients_data:
+            row = current.pop(item['id'].pk, None)
+            if row is None or row.amount != item['amount']:
+                row = RecipeIngredient(recipe=recipe, ingredient=item['id'],
+                                       amount=item['amount'])
+                changed.append(row)
+            rows.append(row)
+
+        if changed:
+            RecipeIngredient.objects.bulk_create(
+                changed,
+                update_conflicts=True,
+                unique_fields=['recipe', 'ingredient'],
+                update_fields=['amount']
+            )
+        if current:
+            RecipeIngredient.objects.filter(
+                pk__in=[row.pk for row in current.values()]).delete()
+        return rows
 
     def to_representation(self, instance):
+        # Ответ собирается из только что записанных строк, поэтому
+        # RecipeReadSerializer не перечитывает ингредиенты из БД.
+        rows = getattr(self, 'ingredient_rows', None)
+        if rows is not None:
+            instance._prefetched_objects_cache = {
+                **getattr(instance, '_prefetched_objects_cache', {}),
+                'recipe_ingredients': rows,
+            }
         return RecipeReadSerializer(instance, context=self.context).data
 
 
-class RecipeShortSerializer(serializers.ModelSerializer):
+class RecipeShortSerializer(ImageVariantsMixin, serializers.ModelSerializer):
     image = Base64ImageField()
+    image_small = serializers.ImageField(read_only=True)
+    image_webp = serializers.ImageField(read_only=True)
+    variant_fields = ('image_small', 'image_webp')
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'cooking_time', 'image_small',
+                  'image_webp')
 
 
 class IngredientSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ingredient
         fields = ('id', 'name', 'measurement_unit')
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_MAX_RECIPES
+    )
@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from .authentication import evict_token, evict_user
+from .conditional import bump_recipes_generation, bump_users_generation
+
+User = get_user_model()
+
+# Поля пользователя, которые попадают в ответы со списками рецептов
+# и пользователей.
+PUBLIC_USER_FIELDS = ('username', 'email', 'first_name', 'last_name',
+                      'avatar', 'avatar_small', 'avatar_webp')
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+@receiver([post_save, post_delete], sender=Ingredient)
+def recipes_changed(sender, **kwargs):
+    transaction.on_commit(bump_recipes_generation)
+
+
+def public_fields_changed(instance, update_fields):
+    fields = [field for field in PUBLIC_USER_FIELDS
+              if update_fields is None or field in update_fields]
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None:
+        return bool(fields)
+    return any(getattr(instance, field) != loaded.get(field)
+               for field in fields)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    transaction.on_commit(lambda: evict_user(instance.pk))
+    if created:
+        # Новый пользователь меняет только список пользователей.
+        transaction.on_commit(bump_users_generation)
+    elif public_fields_changed(instance, update_fields):
+        transaction.on_commit(bump_recipes_generation)
+        transaction.on_commit(bump_users_generation)
+    instance._loaded_values = {field: getattr(instance, field)
+                               for field in PUBLIC_USER_FIELDS}
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: evict_user(instance.pk))
+    transaction.on_commit(bump_recipes_generation)
+    transaction.on_commit(bump_users_generation)
+
+
+@receiver(post_delete, sender=Token)
+def evict_cached_token(sender, instance, **kwargs):
+    transaction.on_commit(lambda: evict_token(instance.key))
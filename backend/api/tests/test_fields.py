@@ -0,0 +1,33 @@
+import base64
+import io
+
+from django.test import SimpleTestCase
+from PIL import Image
+from rest_framework import serializers
+
+from api.fields import StreamingBase64ImageField
+
+
+def png_bytes():
+    file = io.BytesIO()
+    Image.new('RGB', (2, 2)).save(file, format='PNG')
+    return file.getvalue()
+
+
+class StreamingBase64ImageFieldTests(SimpleTestCase):
+
+    def test_accepts_base64_with_line_breaks(self):
+        content = png_bytes()
+        encoded = base64.encodebytes(content).decode()
+        encoded = '\n'.join(encoded[i:i + 8]
+                            for i in range(0, len(encoded), 8))
+        for data in (encoded, 'data:image/png;base64,' + encoded,
+                     ' ' + encoded.replace('\n', '\r\n ') + '\n'):
+            with self.subTest(data=data[:30]):
+                upload = StreamingBase64ImageField().to_internal_value(data)
+                self.assertEqual(upload.read(), content)
+
+    def test_rejects_invalid_base64(self):
+        with self.assertRaises(serializers.ValidationError):
+            StreamingBase64ImageField().to_internal_value('data:image/png;'
+                                                          'base64,@@@@')
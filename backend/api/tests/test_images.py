@@ -0,0 +1,57 @@
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.tests.utils import make_user, png_base64
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageCleanupTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.names = [
+            default_storage.save(name, ContentFile(b'image'))
+            for name in ('users/old.png', 'users/old_small.jpg',
+                         'users/old.webp')
+        ]
+        avatar, small, webp = self.names
+        self.user = make_user('reader', avatar=avatar, avatar_small=small,
+                              avatar_webp=webp)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertFilesDeleted(self, request):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = request()
+        self.assertLess(response.status_code, 400, response.content)
+        for name in self.names:
+            self.assertTrue(default_storage.exists(name), name)
+        for callback in callbacks:
+            # Варианты нового аватара строит фоновый пул, здесь он не нужен.
+            if 'schedule_variants' not in callback.__qualname__:
+                callback()
+        for name in self.names:
+            self.assertFalse(default_storage.exists(name), name)
+
+    def test_replaced_avatar_files_are_deleted(self):
+        self.assertFilesDeleted(lambda: self.client.put(
+            '/api/users/me/avatar/', {'avatar': png_base64()},
+            format='json'))
+
+    def test_cleared_avatar_files_are_deleted(self):
+        self.assertFilesDeleted(
+            lambda: self.client.delete('/api/users/me/avatar/'))
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.avatar)
+        self.assertFalse(self.user.avatar_small)
@@ -0,0 +1,24 @@
+from django.test import TestCase
+
+from api.metrics import registry
+
+
+class MetricsMethodTests(TestCase):
+
+    def setUp(self):
+        self.saved = (dict(registry._histograms), dict(registry._responses))
+        registry._histograms.clear()
+        registry._responses.clear()
+
+    def tearDown(self):
+        registry._histograms.clear()
+        registry._responses.clear()
+        registry._histograms.update(self.saved[0])
+        registry._responses.update(self.saved[1])
+
+    def test_unknown_methods_share_one_series(self):
+        for method in ('FOO', 'BAR', 'get'):
+            self.client.generic(method, '/api/recipes/')
+        self.client.get('/api/recipes/')
+        methods = {method for _, method, _ in registry._responses}
+        self.assertEqual(methods, {'GET', 'OTHER'})
@@ -0,0 +1,92 @@
+import base64
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.tests.utils import make_user
+from recipes.models import Recipe
+
+
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = make_user('author')
+        # Разное число повторов слова даёт разный, нецелый ранг поиска.
+        Recipe.objects.bulk_create(
+            Recipe(author=author, name=f'Рецепт {i}',
+                   text=' '.join(['борщ'] * (i % 7 + 1) + ['суп'] * i),
+                   cooking_time=i % 5 + 1, image='recipes/page.png')
+            for i in range(1, 31)
+        )
+
+    def walk(self, params):
+        client = APIClient()
+        response = client.get('/api/recipes/',
+                              {**params, 'pagination': 'cursor', 'limit': 4})
+        ids = []
+        # Ограничение на случай, если курсор зациклится на одной странице.
+        for _ in range(Recipe.objects.count()):
+            self.assertEqual(response.status_code, 200, response.content)
+            page = response.json()
+            ids += [recipe['id'] for recipe in page['results']]
+            if page['next'] is None:
+                return ids
+            response = client.get(page['next'])
+        self.fail(f'Курсорная пагинация не закончилась: {ids}')
+
+    def test_search_pages_have_no_duplicates(self):
+        ids = self.walk({'search': 'борщ'})
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(len(ids), Recipe.objects.count())
+
+    def test_ordering_pages_have_no_duplicates(self):
+        ids = self.walk({'ordering': 'cooking_time'})
+        self.assertEqual(sorted(ids),
+                         sorted(Recipe.objects.values_list('id', flat=True)))
+
+    def test_tampered_cursor(self):
+        client = APIClient()
+        for params, value in (
+            ({'ordering': 'cooking_time'}, 'abc'),
+            ({'ordering': '-author'}, [1]),
+            ({'ordering': 'name'}, None),
+            ({'search': 'борщ'}, 'abc'),
+        ):
+            with self.subTest(params=params, value=value):
+                cursor = base64.urlsafe_b64encode(
+                    json.dumps([value, 1]).encode()).decode()
+                response = client.get('/api/recipes/',
+                                      {**params, 'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+
+# Реплика не видит данных из транзакции TestCase.
+@override_settings(DATABASE_REPLICAS=[])
+class CountCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user('reader')
+        Recipe.objects.bulk_create(
+            Recipe(author=cls.user, name=f'Рецепт {i}', text='Описание',
+                   cooking_time=5, image='recipes/page.png')
+            for i in range(3)
+        )
+
+    def test_unfiltered_count_is_cached(self):
+        cache.clear()
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get('/api/recipes/', {'limit': 1})
+            self.assertEqual(response.data['count'], 3)
+            self.assertEqual(response['X-Count-Exact'], 'true')
+        counting = [query['sql'] for query in queries
+                    if 'pg_class' in query['sql'] or 'COUNT(' in query['sql']]
+        self.assertEqual(counting, [])
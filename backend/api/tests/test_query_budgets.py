@@ -0,0 +1,510 @@
+import itertools
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, get_resolver
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.tests.utils import make_user, png_base64
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart)
+from users.models import Subscription, User
+
+# Маленький и большой набор данных: число запросов не должно зависеть
+# от того, сколько строк попало на страницу.
+SIZES = (1, 50)
+PASSWORD = 'budget-password-123'
+MEDIA_ROOT = tempfile.mkdtemp()
+
+# (имя маршрута, метод) -> максимум SQL-запросов на один HTTP-запрос.
+BUDGETS = {
+    ('api-root', 'GET'): 0,
+    ('login', 'POST'): 6,
+    ('logout', 'POST'): 3,
+    ('metrics', 'GET'): 1,
+    ('recipe-short-link', 'GET'): 1,
+    ('recipe-short-redirect', 'GET'): 1,
+    ('recipes-list', 'GET'): 8,
+    ('recipes-list', 'POST'): 10,
+    ('recipes-detail', 'GET'): 7,
+    ('recipes-detail', 'PATCH'): 13,
+    ('recipes-detail', 'DELETE'): 9,
+    ('recipes-favorite', 'POST'): 2,
+    ('recipes-favorite', 'DELETE'): 2,
+    ('recipes-shopping-cart', 'POST'): 2,
+    ('recipes-shopping-cart', 'DELETE'): 2,
+    ('recipes-favorite-bulk', 'POST'): 2,
+    ('recipes-favorite-bulk', 'DELETE'): 2,
+    ('recipes-shopping-cart-bulk', 'POST'): 2,
+    ('recipes-shopping-cart-bulk', 'DELETE'): 2,
+    ('recipes-clear-favorites', 'DELETE'): 2,
+    ('recipes-clear-shopping-cart', 'DELETE'): 2,
+    ('recipes-download-shopping-cart', 'GET'): 2,
+    ('ingredients-list', 'GET'): 1,
+    ('ingredients-detail', 'GET'): 1,
+    ('users-list', 'GET'): 7,
+    ('users-list', 'POST'): 5,
+    ('users-detail', 'GET'): 6,
+    ('users-me', 'GET'): 4,
+    ('users-avatar', 'PUT'): 4,
+    ('users-avatar', 'DELETE'): 4,
+    ('users-set-password', 'POST'): 2,
+    ('users-subscriptions', 'GET'): 7,
+    ('users-subscribe', 'POST'): 6,
+    ('users-subscribe', 'DELETE'): 2,
+}
+
+# Почтовые сценарии djoser фронтенд не использует.
+EXCLUDED_ROUTES = {
+    'users-activation',
+    'users-resend-activation',
+    'users-reset-password',
+    'users-reset-password-confirm',
+    'users-reset-username',
+    'users-reset-username-confirm',
+    'users-set-username',
+}
+
+
+def route_names(resolver=None):
+    resolver = resolver or get_resolver()
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLPattern):
+            if pattern.name:
+                yield pattern.name
+        elif pattern.app_name != 'admin':
+            yield from route_names(pattern)
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    QUERY_INSPECTOR_ENABLED=True,
+    QUERY_INSPECTOR_STRICT=True,
+    QUERY_INSPECTOR_SLOW_QUERY_MS=60_000,
+    QUERY_INSPECTOR_BUDGETS={},
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    # Реплика не видит данных из транзакции TestCase.
+    DATABASE_REPLICAS=[],
+)
+class QueryBudgetTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.sequence = itertools.count()
+
+    def create_user(self, **kwargs):
+        number = next(self.sequence)
+        return make_user(f'user{number}', password=PASSWORD, **kwargs)
+
+    def create_ingredients(self, count):
+        number = next(self.sequence)
+        return Ingredient.objects.bulk_create(
+            Ingredient(name=f'ингредиент{number} {i}', measurement_unit='г')
+            for i in range(count)
+        )
+
+    def create_recipes(self, author, count, ingredients=None):
+        ingredients = ingredients or self.create_ingredients(1)
+        recipes = Recipe.objects.bulk_create(
+            Recipe(author=author, name=f'Рецепт {i}', text='Описание',
+                   cooking_time=10, image='recipes/budget.png')
+            for i in range(count)
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=i)
+            for recipe in recipes
+            for i, ingredient in enumerate(ingredients, start=1)
+        )
+        return recipes
+
+    def link(self, model, user, recipes):
+        model.objects.bulk_create(model(user=user, recipe=recipe)
+                                  for recipe in recipes)
+
+    def client_for(self, user=None):
+        client = APIClient()
+        if user is not None:
+            token, _ = Token.objects.get_or_create(user=user)
+            client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+    def count_queries(self, request):
+        # Кеши очищаются, чтобы каждый замер шёл по холодному пути.
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+            # Потоковый ответ выполняет запросы при чтении тела.
+            content = (b''.join(response.streaming_content)
+                       if response.streaming else response.content)
+        # Журнал запросов сбрасывается сигналом request_started.
+        return response, content, len(queries)
+
+    def assertQueryBudget(self, route, method, scenario):
+        budget = BUDGETS[route, method]
+        counts = {}
+        for size in SIZES:
+            response, content, counts[size] = self.count_queries(
+                scenario(size))
+            self.assertLess(response.status_code, 400,
+                            f'{route} {method}: {content!r}')
+        for size, count in counts.items():
+            self.assertLessEqual(
+                count, budget,
+                f'{route} {method}: {count} запросов при размере {size}, '
+                f'бюджет {budget}')
+        self.assertEqual(
+            len(set(counts.values())), 1,
+            f'{route} {method}: число запросов зависит от объёма данных '
+            f'{counts}')
+
+    def test_every_route_has_budget(self):
+        budgeted = {route for route, _ in BUDGETS}
+        missing = set(route_names()) - budgeted - EXCLUDED_ROUTES
+        self.assertFalse(missing, f'Маршруты без бюджета: {missing}')
+
+    def test_api_root(self):
+        self.assertQueryBudget(
+            'api-root', 'GET', lambda size: lambda: self.client_for().get(
+                '/api/'))
+
+    def test_login(self):
+        def scenario(size):
+            user = self.create_user()
+            self.create_recipes(user, size)
+            return lambda: self.client_for().post(
+                '/api/auth/token/login/',
+                {'email': user.email, 'password': PASSWORD}, format='json')
+        self.assertQueryBudget('login', 'POST', scenario)
+
+    def test_logout(self):
+        def scenario(size):
+            user = self.create_user()
+            self.create_recipes(user, size)
+            client = self.client_for(user)
+            return lambda: client.post('/api/auth/token/logout/')
+        self.assertQueryBudget('logout', 'POST', scenario)
+
+    def test_metrics(self):
+        def scenario(size):
+            user = self.create_user(is_staff=True)
+            self.create_recipes(user, size)
+            client = self.client_for(user)
+            return lambda: client.get('/api/metrics/')
+        self.assertQueryBudget('metrics', 'GET', scenario)
+
+    def test_short_link(self):
+        def scenario(size):
+            recipe = self.create_recipes(self.create_user(), size)[-1]
+            return lambda: self.client_for().get(
+                f'/api/recipes/{recipe.id}/get-link/')
+        self.assertQueryBudget('recipe-short-link', 'GET', scenario)
+
+    def test_short_redirect(self):
+        def scenario(size):
+            recipe = self.create_recipes(self.create_user(), size)[-1]
+            return lambda: self.client_for().get(f'/s/{recipe.id:x}/')
+        self.assertQueryBudget('recipe-short-redirect', 'GET', scenario)
+
+    def test_recipes_list(self):
+        for client_user in (None, 'reader'):
+            with self.subTest(user=client_user):
+                def scenario(size):
+                    user = self.create_user()
+                    recipes = self.create_recipes(
+                        self.create_user(), size,
+                        self.create_ingredients(3))
+                    self.link(Favorite, user, recipes)
+                    self.link(ShoppingCart, user, recipes)
+                    Recipe.objects.exclude(
+                        id__in=[recipe.id for recipe in recipes]).delete()
+                    client = self.client_for(user if client_user else None)
+                    return lambda: client.get(f'/api/recipes/?limit={size}')
+                self.assertQueryBudget('recipes-list', 'GET', scenario)
+
+    def test_recipes_list_filters(self):
+        def scenario(size):
+            user = self.create_user()
+            recipes = self.create_recipes(user, size)
+            self.link(Favorite, user, recipes)
+            client = self.client_for(user)
+            return lambda: client.get(
+                f'/api/recipes/?limit={size}&is_favorited=1'
+                f'&author={user.id}')
+        self.assertQueryBudget('recipes-list', 'GET', scenario)
+
+    def test_recipes_cursor_pagination(self):
+        def scenario(size):
+            recipes = self.create_recipes(self.create_user(), size)
+            Recipe.objects.exclude(
+                id__in=[recipe.id for recipe in recipes]).delete()
+            return lambda: self.client_for().get(
+                f'/api/recipes/?limit={size}&pagination=cursor')
+        self.assertQueryBudget('recipes-list', 'GET', scenario)
+
+    def test_recipe_create(self):
+        def scenario(size):
+            client = self.client_for(self.create_user())
+            data = {
+                'ingredients': [
+                    {'id': ingredient.id, 'amount': 5}
+                    for ingredient in self.create_ingredients(size)
+                ],
+                'image': png_base64(),
+                'name': 'Новый рецепт',
+                'text': 'Описание',
+                'cooking_time': 15,
+            }
+            return lambda: client.post('/api/recipes/', data, format='json')
+        self.assertQueryBudget('recipes-list', 'POST', scenario)
+
+    def test_recipe_retrieve(self):
+        def scenario(size):
+            user = self.create_user()
+            recipe, = self.create_recipes(self.create_user(), 1,
+                                          self.create_ingredients(size))
+            client = self.client_for(user)
+            return lambda: client.get(f'/api/recipes/{recipe.id}/')
+        self.assertQueryBudget('recipes-detail', 'GET', scenario)
+
+    def test_recipe_update(self):
+        def scenario(size):
+            user = self.create_user()
+            ingredients = self.create_ingredients(size * 2)
+            recipe, = self.create_recipes(user, 1, ingredients[:size])
+            client = self.client_for(user)
+            data = {
+                'ingredients': [
+                    {'id': ingredient.id, 'amount': 7}
+                    for ingredient in ingredients[size:]
+                ],
+                'name': 'Изменённый рецепт',
+                'text': 'Описание',
+                'cooking_time': 20,
+            }
+            return lambda: client.patch(f'/api/recipes/{recipe.id}/', data,
+                                        format='json')
+        self.assertQueryBudget('recipes-detail', 'PATCH', scenario)
+
+    def test_recipe_delete(self):
+        def scenario(size):
+            user = self.create_user()
+            recipe, = self.create_recipes(user, 1,
+                                          self.create_ingredients(size))
+            for _ in range(size):
+                reader = self.create_user()
+                self.link(Favorite, reader, [recipe])
+                self.link(ShoppingCart, reader, [recipe])
+            client = self.client_for(user)
+            return lambda: client.delete(f'/api/recipes/{recipe.id}/')
+        self.assertQueryBudget('recipes-detail', 'DELETE', scenario)
+
+    def test_recipe_toggles(self):
+        for url, model, route in (
+            ('favorite', Favorite, 'recipes-favorite'),
+            ('shopping_cart', ShoppingCart, 'recipes-shopping-cart'),
+        ):
+            with self.subTest(route=route):
+                def add(size):
+                    user = self.create_user()
+                    recipes = self.create_recipes(self.create_user(), size)
+                    self.link(model, user, recipes[1:])
+                    client = self.client_for(user)
+                    return lambda: client.post(
+                        f'/api/recipes/{recipes[0].id}/{url}/')
+
+                def remove(size):
+                    user = self.create_user()
+                    recipes = self.create_recipes(self.create_user(), size)
+                    self.link(model, user, recipes)
+                    client = self.client_for(user)
+                    return lambda: client.delete(
+                        f'/api/recipes/{recipes[0].id}/{url}/')
+                self.assertQueryBudget(route, 'POST', add)
+                self.assertQueryBudget(route, 'DELETE', remove)
+
+    def test_recipe_bulk_toggles(self):
+        for url, model, route in (
+            ('favorite', Favorite, 'recipes-favorite-bulk'),
+            ('shopping_cart', ShoppingCart, 'recipes-shopping-cart-bulk'),
+        ):
+            with self.subTest(route=route):
+                def add(size):
+                    recipes = self.create_recipes(self.create_user(), size)
+                    client = self.client_for(self.create_user())
+                    data = {'recipes': [recipe.id for recipe in recipes]}
+                    return lambda: client.post(f'/api/recipes/{url}/', data,
+                                               format='json')
+
+                def remove(size):
+                    user = self.create_user()
+                    recipes = self.create_recipes(self.create_user(), size)
+                    self.link(model, user, recipes)
+                    client = self.client_for(user)
+                    data = {'recipes': [recipe.id for recipe in recipes]}
+                    return lambda: client.delete(f'/api/recipes/{url}/',
+                                                 data, format='json')
+                self.assertQueryBudget(route, 'POST', add)
+                self.assertQueryBudget(route, 'DELETE', remove)
+
+    def test_recipe_clear(self):
+        for url, model, route in (
+            ('favorite', Favorite, 'recipes-clear-favorites'),
+            ('shopping_cart', ShoppingCart, 'recipes-clear-shopping-cart'),
+        ):
+            with self.subTest(route=route):
+                def scenario(size):
+                    user = self.create_user()
+                    self.link(model, user,
+                              self.create_recipes(self.create_user(), size))
+                    client = self.client_for(user)
+                    return lambda: client.delete(
+                        f'/api/recipes/{url}/clear/')
+                self.assertQueryBudget(route, 'DELETE', scenario)
+
+    def test_download_shopping_cart(self):
+        def scenario(size):
+            user = self.create_user()
+            self.link(ShoppingCart, user,
+                      self.create_recipes(self.create_user(), size,
+                                          self.create_ingredients(3)))
+            client = self.client_for(user)
+            return lambda: client.get(
+                '/api/recipes/download_shopping_cart/?format=json')
+        self.assertQueryBudget('recipes-download-shopping-cart', 'GET',
+                               scenario)
+
+    def test_ingredients_list(self):
+        def scenario(size):
+            ingredients = self.create_ingredients(size)
+            prefix = ingredients[0].name.split()[0]
+            return lambda: self.client_for().get(
+                f'/api/ingredients/?name={prefix}')
+        self.assertQueryBudget('ingredients-list', 'GET', scenario)
+
+    def test_ingredients_detail(self):
+        def scenario(size):
+            ingredient = self.create_ingredients(size)[-1]
+            return lambda: self.client_for().get(
+                f'/api/ingredients/{ingredient.id}/')
+        self.assertQueryBudget('ingredients-detail', 'GET', scenario)
+
+    def test_users_list(self):
+        def scenario(size):
+            # djoser по умолчанию (HIDE_USERS) показывает обычному
+            # пользователю только его самого, поэтому список смотрит
+            # администратор.
+            user = self.create_user(is_staff=True)
+            authors = [self.create_user() for _ in range(size)]
+            Subscription.objects.bulk_create(
+                Subscription(user=user, author=author) for author in authors)
+            User.objects.exclude(
+                id__in=[author.id for author in authors]).exclude(
+                id=user.id).delete()
+            client = self.client_for(user)
+
+            def request():
+                response = client.get(f'/api/users/?limit={size}')
+                self.assertEqual(len(response.data['results']), size)
+                return response
+            return request
+        self.assertQueryBudget('users-list', 'GET', scenario)
+
+    def test_user_create(self):
+        def scenario(size):
+            self.create_recipes(self.create_user(), size)
+            number = next(self.sequence)
+            data = {
+                'email': f'new{number}@example.com',
+                'username': f'new{number}',
+                'first_name': 'Имя',
+                'last_name': 'Фамилия',
+                'password': PASSWORD,
+            }
+            return lambda: self.client_for().post('/api/users/', data,
+                                                  format='json')
+        self.assertQueryBudget('users-list', 'POST', scenario)
+
+    def test_user_retrieve(self):
+        def scenario(size):
+            user = self.create_user()
+            author = self.create_user()
+            self.create_recipes(author, size)
+            Subscription.objects.create(user=user, author=author)
+            client = self.client_for(user)
+            return lambda: client.get(f'/api/users/{author.id}/')
+        self.assertQueryBudget('users-detail', 'GET', scenario)
+
+    def test_users_me(self):
+        def scenario(size):
+            user = self.create_user()
+            self.create_recipes(user, size)
+            client = self.client_for(user)
+            return lambda: client.get('/api/users/me/')
+        self.assertQueryBudget('users-me', 'GET', scenario)
+
+    def test_avatar(self):
+        def upload(size):
+            user = self.create_user()
+            self.create_recipes(user, size)
+            client = self.client_for(user)
+            return lambda: client.put('/api/users/me/avatar/',
+                                      {'avatar': png_base64()},
+                                      format='json')
+
+        def delete(size):
+            user = self.create_user(avatar='users/avatars/budget.png')
+            self.create_recipes(user, size)
+            client = self.client_for(user)
+            return lambda: client.delete('/api/users/me/avatar/')
+        self.assertQueryBudget('users-avatar', 'PUT', upload)
+        self.assertQueryBudget('users-avatar', 'DELETE', delete)
+
+    def test_set_password(self):
+        def scenario(size):
+            user = self.create_user()
+            self.create_recipes(user, size)
+            client = self.client_for(user)
+            data = {'current_password': PASSWORD,
+                    'new_password': 'another-password-456'}
+            return lambda: client.post('/api/users/set_password/', data,
+                                       format='json')
+        self.assertQueryBudget('users-set-password', 'POST', scenario)
+
+    def test_subscriptions(self):
+        def scenario(size):
+            user = self.create_user()
+            for _ in range(size):
+                author = self.create_user()
+                self.create_recipes(author, 3)
+                Subscription.objects.create(user=user, author=author)
+            client = self.client_for(user)
+            return lambda: client.get(
+                f'/api/users/subscriptions/?limit={size}&recipes_limit=2')
+        self.assertQueryBudget('users-subscriptions', 'GET', scenario)
+
+    def test_subscribe(self):
+        def add(size):
+            author = self.create_user()
+            self.create_recipes(author, size)
+            client = self.client_for(self.create_user())
+            return lambda: client.post(f'/api/users/{author.id}/subscribe/')
+
+        def remove(size):
+            user = self.create_user()
+            author = self.create_user()
+            self.create_recipes(author, size)
+            Subscription.objects.create(user=user, author=author)
+            client = self.client_for(user)
+            return lambda: client.delete(
+                f'/api/users/{author.id}/subscribe/')
+        self.assertQueryBudget('users-subscribe', 'POST', add)
+        self.assertQueryBudget('users-subscribe', 'DELETE', remove)
@@ -0,0 +1,110 @@
+from contextlib import ExitStack
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.replicas import read_alias
+from api.tests.utils import make_user
+from api.views import RecipeViewSet
+from recipes.models import Recipe
+
+
+@skipUnless(settings.DATABASE_REPLICAS,
+            'Реплики не настроены: задайте POSTGRES_REPLICA_HOSTS')
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.user = make_user('reader')
+        self.recipe = Recipe.objects.create(
+            author=self.user, name='Рецепт', text='Описание',
+            cooking_time=10, image='recipes/replica.png')
+        self.client = APIClient()
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def queries_by_alias(self, request):
+        with ExitStack() as stack:
+            captured = {
+                alias: stack.enter_context(
+                    CaptureQueriesContext(connections[alias]))
+                for alias in connections
+            }
+            response = request()
+            counts = {alias: len(queries)
+                      for alias, queries in captured.items()}
+        self.assertLess(response.status_code, 400, response.content)
+        return counts
+
+    def replica_queries(self, counts):
+        return sum(counts[alias] for alias in settings.DATABASE_REPLICAS)
+
+    def test_safe_reads_go_to_replica(self):
+        for url in ('/api/recipes/', f'/api/recipes/{self.recipe.id}/',
+                    '/api/ingredients/', '/api/users/'):
+            with self.subTest(url=url):
+                cache.clear()
+                counts = self.queries_by_alias(lambda: self.client.get(url))
+                self.assertGreater(self.replica_queries(counts), 0)
+
+    def test_writes_go_to_primary(self):
+        counts = self.queries_by_alias(lambda: self.client.post(
+            f'/api/recipes/{self.recipe.id}/favorite/'))
+        self.assertEqual(self.replica_queries(counts), 0)
+        self.assertGreater(counts[DEFAULT_DB_ALIAS], 0)
+
+    def test_reads_stick_to_primary_after_write(self):
+        self.client.post(f'/api/recipes/{self.recipe.id}/favorite/')
+        counts = self.queries_by_alias(
+            lambda: self.client.get('/api/recipes/?is_favorited=1'))
+        self.assertEqual(self.replica_queries(counts), 0)
+
+        other = APIClient()
+        other.force_authenticate(make_user('other'))
+        counts = self.queries_by_alias(lambda: other.get('/api/recipes/'))
+        self.assertGreater(self.replica_queries(counts), 0)
+
+    def test_failed_write_does_not_stick(self):
+        self.client.delete(f'/api/recipes/{self.recipe.id}/favorite/')
+        counts = self.queries_by_alias(
+            lambda: self.client.get('/api/recipes/'))
+        self.assertGreater(self.replica_queries(counts), 0)
+
+    def test_cached_snapshots_are_built_on_primary(self):
+        anonymous = APIClient()
+        for url in ('/api/recipes/', '/api/ingredients/?name=а',
+                    f'/api/recipes/{self.recipe.id}/get-link/'):
+            with self.subTest(url=url):
+                cache.clear()
+                counts = self.queries_by_alias(lambda: anonymous.get(url))
+                self.assertEqual(self.replica_queries(counts), 0)
+                self.assertGreater(counts[DEFAULT_DB_ALIAS], 0)
+
+    def test_membership_snapshot_is_read_from_primary(self):
+        with ExitStack() as stack:
+            captured = {
+                alias: stack.enter_context(
+                    CaptureQueriesContext(connections[alias]))
+                for alias in settings.DATABASE_REPLICAS
+            }
+            response = self.client.get('/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+        for alias, queries in captured.items():
+            for query in queries:
+                for table in ('recipes_favorite', 'recipes_shoppingcart',
+                              'users_subscription'):
+                    self.assertNotIn(table, query['sql'], alias)
+
+    def test_alias_is_reset_after_unhandled_error(self):
+        with mock.patch.object(RecipeViewSet, 'list',
+                               side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.get('/api/recipes/')
+        self.assertIsNone(read_alias.get())
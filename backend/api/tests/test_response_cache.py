@@ -0,0 +1,96 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.conditional import get_recipes_generation, get_users_generation
+from api.tests.utils import make_user
+from recipes.models import Recipe
+from users.models import User
+
+
+@override_settings(ALLOWED_HOSTS=['testserver', 'localhost', 'example.com'])
+class ResponseCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = make_user('author')
+        Recipe.objects.bulk_create(
+            Recipe(author=cls.author, name=f'Рецепт {i}', text='Описание',
+                   cooking_time=10, image='recipes/cache.png')
+            for i in range(3)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_host_and_scheme_are_part_of_key(self):
+        first = self.client.get('/api/recipes/?limit=1',
+                                HTTP_HOST='localhost')
+        other_host = self.client.get('/api/recipes/?limit=1',
+                                     HTTP_HOST='example.com')
+        other_scheme = self.client.get('/api/recipes/?limit=1',
+                                       HTTP_HOST='localhost', secure=True)
+        self.assertEqual(
+            [response['X-Cache']
+             for response in (first, other_host, other_scheme)],
+            ['MISS', 'MISS', 'MISS'])
+        self.assertIn('http://example.com/', other_host.json()['next'])
+        self.assertIn('https://localhost/', other_scheme.json()['next'])
+
+        hit = self.client.get('/api/recipes/?limit=1', HTTP_HOST='localhost')
+        self.assertEqual(hit['X-Cache'], 'HIT')
+        self.assertEqual(hit.content, first.content)
+
+    def test_hit_replays_headers(self):
+        miss = self.client.get('/api/recipes/?limit=1')
+        hit = self.client.get('/api/recipes/?limit=1')
+        self.assertEqual((miss['X-Cache'], hit['X-Cache']), ('MISS', 'HIT'))
+        for header in ('Content-Type', 'X-Count-Exact', 'Vary', 'Allow',
+                       'ETag'):
+            with self.subTest(header=header):
+                self.assertEqual(hit[header], miss[header])
+
+
+class UserGenerationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = make_user('reader')
+        self.user = User.objects.get(pk=self.user.pk)
+
+    def generations(self):
+        return get_recipes_generation(), get_users_generation()
+
+    def changed_generations(self, action):
+        before = self.generations()
+        with self.captureOnCommitCallbacks(execute=True):
+            action()
+        after = self.generations()
+        return tuple(old != new for old, new in zip(before, after))
+
+    def test_registration_changes_only_users(self):
+        self.assertEqual(
+            self.changed_generations(lambda: make_user('new')),
+            (False, True))
+
+    def test_password_change_keeps_cache(self):
+        def change_password():
+            self.user.set_password('another-password-456')
+            self.user.save()
+        self.assertEqual(self.changed_generations(change_password),
+                         (False, False))
+
+    def test_public_field_change_bumps_both(self):
+        for field, value in (('first_name', 'Другое'),
+                             ('username', 'renamed'),
+                             ('avatar', 'users/avatars/new.png')):
+            with self.subTest(field=field):
+                def change():
+                    setattr(self.user, field, value)
+                    self.user.save()
+                self.assertEqual(self.changed_generations(change),
+                                 (True, True))
+                # Повторное сохранение без изменений кеш не сбрасывает.
+                self.assertEqual(
+                    self.changed_generations(self.user.save), (False, False))
@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.tests.utils import make_user
+from recipes.models import (Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart)
+
+URL = '/api/recipes/download_shopping_cart/'
+
+
+class ShoppingListTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.other = (make_user(name)
+                               for name in ('buyer', 'other'))
+        salt = Ingredient.objects.create(name='соль', measurement_unit='г')
+        milk = Ingredient.objects.create(name='молоко', measurement_unit='мл')
+        flour = Ingredient.objects.create(name='мука', measurement_unit='г')
+        soup, pie, bread = (
+            Recipe.objects.create(author=cls.other, name=name, text='Текст',
+                                  cooking_time=10, image='recipes/list.png')
+            for name in ('Суп', 'Пирог', 'Хлеб')
+        )
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(recipe=soup, ingredient=salt, amount=5),
+            RecipeIngredient(recipe=soup, ingredient=milk, amount=200),
+            RecipeIngredient(recipe=pie, ingredient=salt, amount=3),
+            RecipeIngredient(recipe=pie, ingredient=milk, amount=100),
+            RecipeIngredient(recipe=pie, ingredient=flour, amount=400),
+            RecipeIngredient(recipe=bread, ingredient=flour, amount=500),
+        ])
+        # Рецепты в чужой корзине не должны влиять на суммы покупателя.
+        ShoppingCart.objects.bulk_create([
+            ShoppingCart(user=cls.user, recipe=soup),
+            ShoppingCart(user=cls.user, recipe=pie),
+            ShoppingCart(user=cls.other, recipe=soup),
+            ShoppingCart(user=cls.other, recipe=bread),
+        ])
+        cls.totals = [
+            ('молоко', 300, 'мл'),
+            ('мука', 400, 'г'),
+            ('соль', 8, 'г'),
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def download(self, list_format):
+        # Запрос выполняется при чтении потока, поэтому тело читается
+        # внутри проверки числа запросов.
+        with self.assertNumQueries(1):
+            response = self.client.get(URL, {'format': list_format})
+            content = b''.join(response.streaming_content).decode()
+        self.assertEqual(response.status_code, 200)
+        return content
+
+    def test_json_totals(self):
+        items = json.loads(self.download('json'))
+        self.assertEqual(
+            [(item['name'], item['total_amount'], item['unit'])
+             for item in items],
+            self.totals)
+
+    def test_csv_totals(self):
+        header, *rows = csv.reader(io.StringIO(self.download('csv')))
+        self.assertEqual(
+            [(name, int(amount), unit) for name, amount, unit in rows],
+            self.totals)
+
+    def test_txt_totals(self):
+        lines = self.download('txt').splitlines()[2:]
+        self.assertEqual(
+            lines,
+            [f'{name} – {amount} {unit}'
+             for name, amount, unit in self.totals])
+
+    def test_empty_cart(self):
+        ShoppingCart.objects.filter(user=self.user).delete()
+        self.assertEqual(json.loads(self.download('json')), [])
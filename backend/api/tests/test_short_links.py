@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.tests.utils import make_user
+from recipes.models import Recipe
+from recipes.recipe_ids import recipe_ids
+
+
+class ShortLinkTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = make_user('author')
+        cls.recipe = cls.create_recipe()
+
+    @classmethod
+    def create_recipe(cls):
+        return Recipe.objects.create(
+            author=cls.author, name='Рецепт', text='Описание',
+            cooking_time=5, image='recipes/short.png')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_recipe_newer_than_bitmap(self):
+        self.assertIn(self.recipe.id, recipe_ids)
+        # Вне on_commit карта не сбрасывается, как и при создании рецепта
+        # в другом процессе.
+        recipe = self.create_recipe()
+        response = self.client.get(f'/api/recipes/{recipe.id}/get-link/')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(f'/s/{recipe.id:x}/')
+        self.assertEqual(response.status_code, 302)
+
+    def test_missing_recipe(self):
+        self.assertIn(self.recipe.id, recipe_ids)
+        for pk in (self.recipe.id - 1, self.recipe.id + 1):
+            with self.subTest(pk=pk):
+                response = self.client.get(f'/api/recipes/{pk}/get-link/')
+                self.assertEqual(response.status_code, 404)
+
+    def test_ids_above_upper_bound_skip_database(self):
+        self.client.get(f'/api/recipes/{self.recipe.id + 1}/get-link/')
+        for pk in (self.recipe.id + 1000, 0xffffffff):
+            with self.subTest(pk=pk), self.assertNumQueries(0):
+                response = self.client.get(f'/s/{pk:x}/')
+                self.assertEqual(response.status_code, 404)
+
+    def test_created_recipe_raises_upper_bound(self):
+        self.client.get(f'/api/recipes/{self.recipe.id + 1}/get-link/')
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = self.create_recipe()
+        response = self.client.get(f'/s/{recipe.id:x}/')
+        self.assertEqual(response.status_code, 302)
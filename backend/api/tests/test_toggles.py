@@ -0,0 +1,67 @@
+import threading
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.tests.utils import make_user
+from recipes.models import Favorite, Recipe
+from users.models import Subscription
+
+THREADS = 16
+
+
+class ConcurrentToggleTests(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = make_user('reader')
+        self.author = make_user('author')
+        self.recipe = Recipe.objects.create(
+            author=self.author, name='Рецепт', text='Описание',
+            cooking_time=10, image='recipes/toggle.png')
+        self.token = Token.objects.create(user=self.user)
+
+    def run_concurrently(self, method, url):
+        barrier = threading.Barrier(THREADS)
+        statuses = []
+
+        def worker():
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+            try:
+                barrier.wait()
+                statuses.append(getattr(client, method)(url).status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sorted(statuses)
+
+    def test_double_click_favorite(self):
+        url = f'/api/recipes/{self.recipe.id}/favorite/'
+        self.assertEqual(self.run_concurrently('post', url),
+                         [201] + [400] * (THREADS - 1))
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 1)
+        self.assertEqual(Favorite.objects.count(), 1)
+
+        self.assertEqual(self.run_concurrently('delete', url),
+                         [204] + [400] * (THREADS - 1))
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 0)
+        self.assertFalse(Favorite.objects.exists())
+
+    def test_double_click_subscribe(self):
+        url = f'/api/users/{self.author.id}/subscribe/'
+        self.assertEqual(self.run_concurrently('post', url),
+                         [201] + [400] * (THREADS - 1))
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.subscribers_count, 1)
+        self.assertEqual(Subscription.objects.count(), 1)
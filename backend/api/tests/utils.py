@@ -0,0 +1,21 @@
+import base64
+import io
+
+from PIL import Image
+
+from users.models import User
+
+PASSWORD = 'password-123'
+
+
+def make_user(name, password=PASSWORD, **fields):
+    return User.objects.create_user(
+        username=name, email=f'{name}@example.com', first_name='Имя',
+        last_name='Фамилия', password=password, **fields)
+
+
+def png_base64():
+    file = io.BytesIO()
+    Image.new('RGB', (10, 10), color='grey').save(file, 'png')
+    return ('data:image/png;base64,'
+            + base64.b64encode(file.getvalue()).decode())
@@ -0,0 +1,88 @@
+import time
+from contextlib import contextmanager
+
+
+class RequestTimer:
+    # Счётчики одного запроса; каждый запрос обслуживается одним потоком,
+    # поэтому блокировки здесь не нужны.
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.spans = {}
+        self._started = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+    def start(self, name):
+        self._started[name] = (time.perf_counter(), self.db)
+
+    def stop(self, name):
+        if name not in self._started:
+            return
+        started, db = self._started.pop(name)
+        # Запросы, выполненные внутри отрезка, учитываются в db.
+        elapsed = time.perf_counter() - started - (self.db - db)
+        self.spans[name] = self.spans.get(name, 0.0) + elapsed
+
+    @contextmanager
+    def span(self, name):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name)
+
+    def header(self, total):
+        metrics = [
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"']
+        metrics += [f'{name};dur={duration * 1000:.1f}'
+                    for name, duration in self.spans.items()]
+        metrics.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+def get_timer(request):
+    return getattr(request, 'timer', None)
+
+
+@contextmanager
+def timed(request, name):
+    timer = get_timer(request)
+    if timer is None:
+        yield
+        return
+    with timer.span(name):
+        yield
+
+
+class ServerTimingMixin:
+    # Обработчик DRF-представления — это в основном сериализация:
+    # время между проверкой прав и формированием ответа за вычетом SQL.
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        timer = get_timer(request)
+        if timer is not None:
+            timer.start('serialize')
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        timer = get_timer(request)
+        if timer is not None:
+            timer.stop('serialize')
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class TimedRendererMixin:
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        request = (renderer_context or {}).get('request')
+        with timed(request, 'render'):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
@@ -0,0 +1,82 @@
+from django.db import connection
+
+ADD_SQL = """
+WITH added AS (
+    INSERT INTO {through} ({owner_column}, {target_column})
+    SELECT %s, id FROM {target} WHERE id = ANY(%s)
+    ON CONFLICT DO NOTHING
+    RETURNING {target_column}
+)
+UPDATE {target} SET {counter} = {counter} + 1
+FROM added WHERE {target}.id = added.{target_column}
+RETURNING {columns}
+"""
+
+REMOVE_SQL = """
+WITH removed AS (
+    DELETE FROM {through}
+    WHERE {owner_column} = %s {targets}
+    RETURNING {target_column}
+)
+UPDATE {target} SET {counter} = GREATEST({counter} - 1, 0)
+FROM removed WHERE {target}.id = removed.{target_column}
+RETURNING {target}.id
+"""
+
+
+def _format(sql, through, field, counter, fields=None, targets=''):
+    quote = connection.ops.quote_name
+    target = field.related_model
+    table = quote(target._meta.db_table)
+    if fields is None:
+        fields = [item.name for item in target._meta.concrete_fields]
+    return sql.format(
+        through=quote(through._meta.db_table),
+        owner_column=quote(through._meta.get_field('user').column),
+        target=table,
+        target_column=quote(field.column),
+        targets=targets,
+        counter=quote(target._meta.get_field(counter).column),
+        columns=', '.join(
+            f'{table}.{quote(target._meta.get_field(name).column)}'
+            for name in fields
+        ),
+    )
+
+
+def add_relations(through, field_name, counter, user_id, target_ids,
+                  fields=None):
+    # Вставка, инкремент счётчиков и чтение нужных колонок целей выполняются
+    # одним запросом. Уже существующие связи пропускаются уникальным
+    # индексом, поэтому гонка двойного клика не даёт IntegrityError.
+    field = through._meta.get_field(field_name)
+    sql = _format(ADD_SQL, through, field, counter, fields)
+    return list(field.related_model.objects.raw(
+        sql, [user_id, list(target_ids)]))
+
+
+def add_relation(through, field_name, counter, user_id, target_id,
+                 fields=None):
+    added = add_relations(through, field_name, counter, user_id,
+                          [target_id], fields)
+    return added[0] if added else None
+
+
+def remove_relations(through, field_name, counter, user_id,
+                     target_ids=None):
+    # Без target_ids удаляются все связи пользователя.
+    field = through._meta.get_field(field_name)
+    params = [user_id]
+    targets = ''
+    if target_ids is not None:
+        params.append(list(target_ids))
+        targets = f'AND {connection.ops.quote_name(field.column)} = ANY(%s)'
+    sql = _format(REMOVE_SQL, through, field, counter, targets=targets)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def remove_relation(through, field_name, counter, user_id, target_id):
+    return bool(remove_relations(through, field_name, counter, user_id,
+                                 [target_id]))
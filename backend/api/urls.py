@@ -4,7 +4,7 @@ from django.conf.urls.static import static
 from django.conf import settings
 
 from .views import (RecipeViewSet, IngredientViewSet,
-                    UserViewSet, RecipeShortLinkView)
+                    UserViewSet, RecipeShortLinkView, MetricsView)
 
 app_name = 'api'
 
@@ -17,5 +17,6 @@ urlpatterns = [
     path('auth/', include('djoser.urls.authtoken')),
     path('recipes/<int:id>/get-link/', RecipeShortLinkView.as_view(),
          name='recipe-short-link'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
     path('', include(router.urls)),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -4,125 +4,253 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.contrib.auth import get_user_model
 from djoser.views import UserViewSet as DjoserUserViewSet
-from django.db.models import Sum, F
+from django.db import transaction
+from django.db.models import Sum, F, Prefetch, Window
+from django.db.models.functions import RowNumber
 from django.shortcuts import get_object_or_404, redirect
 from django.conf import settings
 
 from users.models import Subscription
-from recipes.models import Recipe, ShoppingCart, Favorite, Ingredient
+from recipes.ingredient_index import ingredient_index
+from recipes.recipe_ids import recipe_ids
+from recipes.models import (Recipe, ShoppingCart, Favorite, Ingredient,
+                            RecipeIngredient)
 from .serializers import (RecipeReadSerializer, RecipeWriteSerializer,
                           RecipeShortSerializer, IngredientSerializer,
                           AvatarUploadSerializer, SubscriptionSerializer,
-                          SetPasswordSerializer)
+                          SetPasswordSerializer, RecipeIdsSerializer)
 from .permissions import IsAuthorOrReadOnly
+from .renderers import (ShoppingListTextRenderer, ShoppingListCSVRenderer,
+                        ShoppingListJSONRenderer)
+from .constants import (SHOPPING_LIST_FILENAME, SHOPPING_LIST_CHUNK_SIZE,
+                        BULK_ADDED, BULK_REMOVED, BULK_ALREADY_ADDED,
+                        BULK_NOT_ADDED, BULK_NOT_FOUND, METRICS_CONTENT_TYPE)
 from .filters import RecipeFilter, IngredientFilter
+from .pagination import FeedPagination
+from .conditional import (conditional_get, get_recipes_generation,
+                          get_users_generation, make_etag)
+from .response_cache import cache_anonymous_response
+from .images import schedule_cleanup, schedule_variants
+from .toggles import (add_relation, add_relations, remove_relation,
+                      remove_relations)
+from .metrics import registry
+from .timing import ServerTimingMixin
+from .replicas import ReplicaReadMixin
+from .membership import (update_membership, FAVORITES, SHOPPING_CART,
+                         SUBSCRIPTIONS)
 
 User = get_user_model()
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ReplicaReadMixin, ServerTimingMixin,
+                    viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_class = RecipeFilter
+    pagination_class = FeedPagination
     permission_classes = [permissions.IsAuthenticatedOrReadOnly,
                           IsAuthorOrReadOnly]
 
+    def get_queryset(self):
+        if self.action not in ['list', 'retrieve', 'update',
+                               'partial_update']:
+            return super().get_queryset()
+
+        return (
+            Recipe.objects
+            .defer('search_vector')
+            .select_related('author')
+            .prefetch_related(Prefetch(
+                'recipe_ingredients',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            ))
+        )
+
     def get_serializer_class(self):
         if self.action in ['list', 'retrieve']:
             return RecipeReadSerializer
         return RecipeWriteSerializer
 
+    def get_conditional_validators(self, request, *args, **kwargs):
+        if self.action == 'list':
+            return make_etag(request, 'recipes', get_recipes_generation(),
+                             request.get_full_path()), None
+
+        if not str(kwargs['pk']).isdigit():
+            return None
+        timestamps = (Recipe.objects.filter(pk=kwargs['pk'])
+                      .values_list('updated_at', 'author__updated_at')
+                      .first())
+        if timestamps is None:
+            return None
+        last_modified = max(timestamps)
+        etag = make_etag(request, 'recipe', kwargs['pk'], last_modified)
+        if request.user.is_authenticated:
+            return etag, None
+        return etag, last_modified
+
+    @conditional_get
+    @cache_anonymous_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get
+    @cache_anonymous_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
-    @action(detail=True, methods=['post', 'delete'], url_path='shopping_cart',
-            permission_classes=[permissions.IsAuthenticated])
-    def shopping_cart(self, request, pk=None):
+    def toggle_recipe(self, request, pk, through, counter, kind, errors):
+        if not str(pk).isdigit():
+            raise Http404
+        pk = int(pk)
         user = request.user
-        recipe = self.get_object()
 
         if request.method == 'POST':
-            if ShoppingCart.objects.filter(user=user, recipe=recipe).exists():
-                return Response({'errors': 'Уже в списке покупок'},
+            recipe = add_relation(through, 'recipe', counter, user.pk, pk,
+                                  fields=RecipeShortSerializer.Meta.fields)
+            if recipe is None:
+                get_object_or_404(Recipe.objects.only('id'), pk=pk)
+                return Response({'errors': errors['exists']},
                                 status=status.HTTP_400_BAD_REQUEST)
-            ShoppingCart.objects.create(user=user, recipe=recipe)
+            update_membership(user.pk, kind, added=[recipe.pk])
             serializer = RecipeShortSerializer(recipe,
                                                context={'request': request})
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        elif request.method == 'DELETE':
-            cart_item = (ShoppingCart.objects
-                         .filter(user=user, recipe=recipe).first())
-            if not cart_item:
-                return Response({'errors': 'Этого рецепта не было в списке'},
-                                status=status.HTTP_400_BAD_REQUEST)
-            cart_item.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
+        if not remove_relation(through, 'recipe', counter, user.pk, pk):
+            get_object_or_404(Recipe.objects.only('id'), pk=pk)
+            return Response({'errors': errors['missing']},
+                            status=status.HTTP_400_BAD_REQUEST)
+        update_membership(user.pk, kind, removed=[pk])
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
-    @action(detail=False, methods=['get'],
-            permission_classes=[permissions.IsAuthenticated])
-    def download_shopping_cart(self, request):
+    def bulk_toggle_recipes(self, request, through, counter, kind):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data['recipes']))
         user = request.user
 
+        if request.method == 'POST':
+            done = {recipe.pk for recipe in add_relations(
+                through, 'recipe', counter, user.pk, ids, fields=['id'])}
+            update_membership(user.pk, kind, added=done)
+            done_status, skipped_status = BULK_ADDED, BULK_ALREADY_ADDED
+        else:
+            done = set(remove_relations(through, 'recipe', counter, user.pk,
+                                        ids))
+            update_membership(user.pk, kind, removed=done)
+            done_status, skipped_status = BULK_REMOVED, BULK_NOT_ADDED
+
+        skipped = [pk for pk in ids if pk not in done]
+        existing = set(Recipe.objects.filter(pk__in=skipped)
+                       .values_list('id', flat=True)) if skipped else set()
+        return Response({'results': [
+            {'id': pk,
+             'status': (done_status if pk in done
+                        else skipped_status if pk in existing
+                        else BULK_NOT_FOUND)}
+            for pk in ids
+        ]})
+
+    def clear_recipes(self, request, through, counter, kind):
+        removed = remove_relations(through, 'recipe', counter,
+                                   request.user.pk)
+        update_membership(request.user.pk, kind, removed=removed)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['post', 'delete'], url_path='shopping_cart',
+            permission_classes=[permissions.IsAuthenticated])
+    def shopping_cart(self, request, pk=None):
+        return self.toggle_recipe(
+            request, pk, ShoppingCart, 'in_cart_count', SHOPPING_CART,
+            {'exists': 'Уже в списке покупок',
+             'missing': 'Этого рецепта не было в списке'}
+        )
+
+    @action(detail=False, methods=['post', 'delete'],
+            url_path='shopping_cart',
+            permission_classes=[permissions.IsAuthenticated])
+    def shopping_cart_bulk(self, request):
+        return self.bulk_toggle_recipes(request, ShoppingCart,
+                                        'in_cart_count', SHOPPING_CART)
+
+    @action(detail=False, methods=['delete'], url_path='shopping_cart/clear',
+            permission_classes=[permissions.IsAuthenticated])
+    def clear_shopping_cart(self, request):
+        return self.clear_recipes(request, ShoppingCart, 'in_cart_count',
+                                  SHOPPING_CART)
+
+    @action(detail=False, methods=['get'],
+            permission_classes=[permissions.IsAuthenticated],
+            renderer_classes=[ShoppingListTextRenderer,
+                              ShoppingListCSVRenderer,
+                              ShoppingListJSONRenderer])
+    def download_shopping_cart(self, request):
         ingredients = (
-            Ingredient.objects
-            .filter(recipes__in_cart__user=user)
-            .annotate(
-                total_amount=Sum('recipeingredient__amount'),
-                unit=F('measurement_unit')
-            )
-            .values('name', 'unit', 'total_amount')
+            RecipeIngredient.objects
+            .filter(recipe__in_cart__user=request.user)
+            .values('ingredient')
+            .annotate(total_amount=Sum('amount'))
+            .values(name=F('ingredient__name'),
+                    unit=F('ingredient__measurement_unit'),
+                    total_amount=F('total_amount'))
             .order_by('name')
+            .iterator(chunk_size=SHOPPING_LIST_CHUNK_SIZE)
         )
 
-        lines = ['Список покупок:\n']
-        for item in ingredients:
-            lines.append(
-                f"{item['name']} – {item['total_amount']} {item['unit']}")
-
-        content = '\n'.join(lines)
-        filename = 'shopping_list.txt'
-        response = HttpResponse(content, content_type='text/plain')
+        renderer = request.accepted_renderer
+        filename = f'{SHOPPING_LIST_FILENAME}.{renderer.format}'
+        response = StreamingHttpResponse(
+            renderer.stream(ingredients),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
         return response
 
     @action(detail=True, methods=['post', 'delete'], url_path='favorite',
             permission_classes=[permissions.IsAuthenticated])
     def favorite(self, request, pk=None):
-        user = request.user
-        recipe = self.get_object()
-
-        if request.method == 'POST':
-            if Favorite.objects.filter(user=user, recipe=recipe).exists():
-                return Response({'errors': 'Уже в избранном'},
-                                status=status.HTTP_400_BAD_REQUEST)
-
-            Favorite.objects.create(user=user, recipe=recipe)
-            serializer = RecipeShortSerializer(recipe,
-                                               context={'request': request})
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return self.toggle_recipe(
+            request, pk, Favorite, 'favorites_count', FAVORITES,
+            {'exists': 'Уже в избранном',
+             'missing': 'Этого рецепта нет в избранном'}
+        )
 
-        if request.method == 'DELETE':
-            favorite = (Favorite.objects
-                        .filter(user=user, recipe=recipe).first())
-            if not favorite:
-                return Response({'errors': 'Этого рецепта нет в избранном'},
-                                status=status.HTTP_400_BAD_REQUEST)
+    @action(detail=False, methods=['post', 'delete'], url_path='favorite',
+            permission_classes=[permissions.IsAuthenticated])
+    def favorite_bulk(self, request):
+        return self.bulk_toggle_recipes(request, Favorite, 'favorites_count',
+                                        FAVORITES)
 
-            favorite.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
+    @action(detail=False, methods=['delete'], url_path='favorite/clear',
+            permission_classes=[permissions.IsAuthenticated])
+    def clear_favorites(self, request):
+        return self.clear_recipes(request, Favorite, 'favorites_count',
+                                  FAVORITES)
 
 
-class RecipeShortLinkView(APIView):
+class RecipeShortLinkView(ServerTimingMixin, APIView):
     def get(self, request, id):
-        recipe = get_object_or_404(Recipe, id=id)
-        short_link = f"{settings.FRONTEND_URL}s/{recipe.id:03x}"
+        if id not in recipe_ids:
+            raise Http404
+        short_link = f"{settings.FRONTEND_URL}s/{id:03x}"
         return Response({'short-link': short_link}, status=status.HTTP_200_OK)
 
 
+class MetricsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(registry.render(),
+                            content_type=METRICS_CONTENT_TYPE)
+
+
 class RecipeShortRedirectView(APIView):
     def get(self, request, short_id):
         try:
@@ -130,26 +258,67 @@ class RecipeShortRedirectView(APIView):
         except ValueError:
             return Response({'error': 'Invalid short link'}, status=400)
 
-        recipe = get_object_or_404(Recipe, id=recipe_id)
+        if recipe_id not in recipe_ids:
+            raise Http404
 
-        return redirect(f"{settings.FRONTEND_URL}recipes/{recipe.id}")
+        return redirect(f"{settings.FRONTEND_URL}recipes/{recipe_id}")
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ReplicaReadMixin, ServerTimingMixin,
+                        viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_class = IngredientFilter
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if name is None:
+            return super().list(request, *args, **kwargs)
+
+        limit = request.query_params.get('limit')
+        limit = int(limit) if limit and limit.isdigit() else None
+        return Response(ingredient_index.search(name, limit))
 
-class UserViewSet(DjoserUserViewSet):
+
+class UserViewSet(ReplicaReadMixin, ServerTimingMixin, DjoserUserViewSet):
+    pagination_class = FeedPagination
 
     def get_permissions(self):
         if self.action in ['list', 'retrieve', 'create']:
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
 
+    def get_conditional_validators(self, request, *args, **kwargs):
+        if self.action in ['list', 'subscriptions']:
+            return make_etag(request, 'users', get_recipes_generation(),
+                             get_users_generation(),
+                             request.get_full_path()), None
+
+        if self.action == 'me':
+            updated_at = request.user.updated_at
+            return make_etag(request, 'me', updated_at), updated_at
+
+        if not str(kwargs['id']).isdigit():
+            return None
+        updated_at = (User.objects.filter(pk=kwargs['id'])
+                      .values_list('updated_at', flat=True).first())
+        if updated_at is None:
+            return None
+        etag = make_etag(request, 'user', kwargs['id'], updated_at)
+        if request.user.is_authenticated:
+            return etag, None
+        return etag, updated_at
+
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=False, methods=['put', 'delete'], url_path='me/avatar',
             permission_classes=[permissions.IsAuthenticated])
     def avatar(self, request):
@@ -157,16 +326,25 @@ class UserViewSet(DjoserUserViewSet):
             serializer = AvatarUploadSerializer(instance=request.user,
                                                 data=request.data)
             serializer.is_valid(raise_exception=True)
-            serializer.save()
+            with transaction.atomic():
+                schedule_cleanup(request.user, 'avatar')
+                serializer.save(avatar_small=None, avatar_webp=None)
+                schedule_variants(request.user, 'avatar')
             return Response({'avatar': request.user.avatar.url},
                             status=status.HTTP_200_OK)
 
         elif request.method == 'DELETE':
-            request.user.avatar.delete(save=True)
+            with transaction.atomic():
+                schedule_cleanup(request.user, 'avatar')
+                request.user.avatar = None
+                request.user.avatar_small = None
+                request.user.avatar_webp = None
+                request.user.save()
             return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, methods=['get'],
             permission_classes=[permissions.IsAuthenticated])
+    @conditional_get
     def me(self, request):
         serializer = self.get_serializer(request.user,
                                          context={'request': request})
@@ -187,40 +365,61 @@ class UserViewSet(DjoserUserViewSet):
     @action(detail=True, methods=['post', 'delete'], url_path='subscribe',
             permission_classes=[permissions.IsAuthenticated])
     def subscribe(self, request, id=None):
+        if not str(id).isdigit():
+            raise Http404
+        id = int(id)
         user = request.user
-        author = self.get_object()
 
-        if user == author:
+        if user.pk == id:
             return Response({'errors': 'Нельзя подписаться на самого себя.'},
                             status=status.HTTP_400_BAD_REQUEST)
 
         if request.method == 'POST':
-            if Subscription.objects.filter(user=user, author=author).exists():
+            author = add_relation(Subscription, 'author', 'subscribers_count',
+                                  user.pk, id)
+            if author is None:
+                get_object_or_404(User.objects.only('id'), pk=id)
                 return Response(
                     {'errors': 'Вы уже подписаны на этого пользователя.'},
                     status=status.HTTP_400_BAD_REQUEST)
-
-            Subscription.objects.create(user=user, author=author)
+            update_membership(user.pk, SUBSCRIPTIONS, added=[author.pk])
             serializer = SubscriptionSerializer(author,
                                                 context={'request': request})
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        elif request.method == 'DELETE':
-            subscription = Subscription.objects.filter(user=user,
-                                                       author=author).first()
-            if not subscription:
-                return Response(
-                    {'errors': 'Вы не подписаны на этого пользователя.'},
-                    status=status.HTTP_400_BAD_REQUEST)
-
-            subscription.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
+        if not remove_relation(Subscription, 'author', 'subscribers_count',
+                               user.pk, id):
+            get_object_or_404(User.objects.only('id'), pk=id)
+            return Response(
+                {'errors': 'Вы не подписаны на этого пользователя.'},
+                status=status.HTTP_400_BAD_REQUEST)
+        update_membership(user.pk, SUBSCRIPTIONS, removed=[id])
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, methods=['get'],
             permission_classes=[permissions.IsAuthenticated],
             url_path='subscriptions')
+    @conditional_get
     def subscriptions(self, request):
-        queryset = User.objects.filter(subscribers__user=request.user)
+        recipes = Recipe.objects.only('id', 'name', 'image', 'cooking_time',
+                                      'image_small', 'image_webp', 'author')
+        recipes_limit = request.query_params.get('recipes_limit')
+        if recipes_limit and recipes_limit.isdigit():
+            recipes = recipes.annotate(
+                row_number=Window(
+                    RowNumber(),
+                    partition_by=F('author_id'),
+                    order_by=F('id').desc(),
+                )
+            ).filter(row_number__lte=int(recipes_limit))
+
+        queryset = (
+            User.objects
+            .filter(subscribers__user=request.user)
+            .order_by('username')
+            .prefetch_related(Prefetch('recipes', queryset=recipes,
+                                       to_attr='short_recipes'))
+        )
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = SubscriptionSerializer(page,
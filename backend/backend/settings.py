@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'django_filters',
@@ -51,6 +52,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.ServerTimingMiddleware',
+    'api.middleware.QueryInspectorMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -90,9 +93,64 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'password'),
         'HOST': os.getenv('POSTGRES_HOST', 'db'),
         'PORT': '5432',
+        'CONN_MAX_AGE': config('CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Реплики получают псевдонимы replica_1, replica_2, ...; для локальной
+# проверки достаточно указать хост основной базы.
+DATABASE_REPLICAS = []
+for number, host in enumerate(
+        config('POSTGRES_REPLICA_HOSTS', default='', cast=Csv()), start=1):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+# Сколько секунд после записи пользователь читает из основной базы.
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=5,
+                                cast=int)
+
+CACHES = {
+    'default': {
+        'BACKEND': config(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': config('CACHE_LOCATION', default='foodgram'),
+    }
+}
+
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=60,
+                                cast=int)
+RESPONSE_CACHE_MAX_ENTRY_SIZE = config('RESPONSE_CACHE_MAX_ENTRY_SIZE',
+                                       default=512 * 1024, cast=int)
+
+QUERY_INSPECTOR_ENABLED = config('QUERY_INSPECTOR_ENABLED', default=DEBUG,
+                                 cast=bool)
+QUERY_INSPECTOR_STRICT = config('QUERY_INSPECTOR_STRICT', default=False,
+                                cast=bool)
+QUERY_INSPECTOR_REPEAT_THRESHOLD = config('QUERY_INSPECTOR_REPEAT_THRESHOLD',
+                                          default=5, cast=int)
+QUERY_INSPECTOR_SLOW_QUERY_MS = config('QUERY_INSPECTOR_SLOW_QUERY_MS',
+                                       default=200, cast=int)
+# Имя маршрута -> подстроки отпечатков SQL, которым разрешено повторяться;
+# '*' отключает проверку повторов для маршрута.
+QUERY_INSPECTOR_ALLOWLIST = {}
+# Имя маршрута -> максимальное число запросов за один HTTP-запрос.
+QUERY_INSPECTOR_BUDGETS = {
+    'recipes-list': 10,
+    'recipes-detail': 14,
+    'users-list': 6,
+    'users-subscriptions': 8,
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -139,7 +197,7 @@ AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -148,6 +206,10 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
     'DEFAULT_PAGINATION_CLASS': 'api.pagination.LimitPageNumberPagination',
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.TimedJSONRenderer',
+        'api.renderers.TimedBrowsableAPIRenderer',
+    ],
 }
 
 DJOSER = {
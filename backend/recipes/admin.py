@@ -15,14 +15,11 @@ class RecipeIngredientInline(admin.TabularInline):
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('name', 'author', 'favorites_count')
+    list_display = ('name', 'author', 'favorites_count', 'in_cart_count')
     search_fields = ('name', 'author__username', 'author__email')
     inlines = [RecipeIngredientInline]
     autocomplete_fields = ['author']
-
-    def favorites_count(self, obj):
-        return obj.favorited_by.count()
-    favorites_count.short_description = 'В избранном'
+    list_select_related = ('author',)
 
 
 @admin.register(Ingredient)
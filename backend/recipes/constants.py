@@ -5,6 +5,7 @@ RECIPE_NAME_MAX_LENGTH = 200
 
 # Путь для загрузки изображений
 RECIPE_IMAGE_UPLOAD_PATH = 'recipes/'
+RECIPE_THUMBNAIL_SIZE = (300, 300)
 
 # Значения по умолчанию и валидации
 AMOUNT_MAX_DIGITS = 6
@@ -19,10 +20,18 @@ RECIPE_ORDERING = ['-id']
 RECIPE_FIELD_AUTHOR = 'Автор'
 RECIPE_FIELD_NAME = 'Название рецепта'
 RECIPE_FIELD_IMAGE = 'Изображение'
+RECIPE_FIELD_IMAGE_SMALL = 'Миниатюра'
+RECIPE_FIELD_IMAGE_WEBP = 'Изображение WebP'
 RECIPE_FIELD_TEXT = 'Описание рецепта'
 RECIPE_FIELD_COOKING_TIME = 'Время приготовления'
 RECIPE_FIELD_INGREDIENTS = 'Ингредиенты'
 RECIPE_FIELD_COOKING_TIME_HELP = 'Время приготовления в минутах'
+RECIPE_FIELD_SEARCH_VECTOR = 'Поисковый вектор'
+RECIPE_FIELD_UPDATED_AT = 'Дата изменения'
+RECIPE_FIELD_FAVORITES_COUNT = 'В избранном'
+RECIPE_FIELD_IN_CART_COUNT = 'В списках покупок'
+RECIPE_SEARCH_CONFIG = 'russian'
+RECIPE_SEARCH_INDEX_NAME = 'recipe_search_vector_idx'
 
 INGREDIENT_VERBOSE_NAME = 'Ингредиент'
 INGREDIENT_VERBOSE_NAME_PLURAL = 'Ингредиенты'
@@ -46,3 +55,13 @@ CART_VERBOSE_NAME_PLURAL = 'Список покупок'
 CART_FIELD_USER = 'Пользователь'
 CART_FIELD_RECIPE = 'Рецепт'
 CART_CONSTRAINT_NAME = 'unique_cart_item'
+
+# Индекс ингредиентов для автодополнения
+INGREDIENT_INDEX_VERSION_KEY = 'ingredient_index_version'
+INGREDIENT_INDEX_TTL = 300
+
+# Битовая карта идентификаторов рецептов для коротких ссылок
+RECIPE_IDS_VERSION_KEY = 'recipe_ids_version'
+RECIPE_IDS_TTL = 300
+RECIPE_IDS_UPPER_BOUND_KEY = 'recipe_ids_upper_bound'
+RECIPE_IDS_UPPER_BOUND_TTL = 30
@@ -0,0 +1,12 @@
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+
+def change_counters(model, pk, **deltas):
+    # Инкремент выполняется в БД одним UPDATE, поэтому параллельные
+    # запросы не затирают изменения друг друга. Разошедшийся счётчик
+    # не уходит в минус, его исправит reconcile_counters.
+    model.objects.filter(pk=pk).update(**{
+        field: Greatest(F(field) + delta, Value(0))
+        for field, delta in deltas.items()
+    })
@@ -0,0 +1,48 @@
+import bisect
+import heapq
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count
+
+from .constants import INGREDIENT_INDEX_VERSION_KEY, INGREDIENT_INDEX_TTL
+from .models import Ingredient
+from .snapshots import VersionedSnapshot
+
+MAX_CHAR = chr(0x10FFFF)
+
+
+class IngredientPrefixIndex(VersionedSnapshot):
+    version_key = INGREDIENT_INDEX_VERSION_KEY
+    ttl = INGREDIENT_INDEX_TTL
+    empty = ((), ())
+
+    def search(self, prefix, limit=None):
+        keys, entries = self._get_data()
+        prefix = prefix.casefold()
+        start = bisect.bisect_left(keys, prefix)
+        end = bisect.bisect_right(keys, prefix + MAX_CHAR, lo=start)
+        matches = entries[start:end]
+        if limit is not None:
+            matches = heapq.nsmallest(limit, matches)
+        else:
+            matches = sorted(matches)
+        return [entry[-1] for entry in matches]
+
+    def load(self):
+        rows = (
+            Ingredient.objects.using(DEFAULT_DB_ALIAS)
+            .annotate(usage=Count('recipeingredient'))
+            .values_list('id', 'name', 'measurement_unit', 'usage')
+        )
+        entries = sorted(
+            (name.casefold(), -usage, pk,
+             {'id': pk, 'name': name, 'measurement_unit': unit})
+            for pk, name, unit, usage in rows
+        )
+        return (
+            [entry[0] for entry in entries],
+            [(usage, key, pk, item) for key, usage, pk, item in entries],
+        )
+
+
+ingredient_index = IngredientPrefixIndex()
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Recompute recipe search vectors in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--only-missing', action='store_true')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        recipes = Recipe.objects.order_by('id')
+        if options['only_missing']:
+            recipes = recipes.filter(search_vector__isnull=True)
+
+        last_id = 0
+        updated = 0
+        while True:
+            batch = list(recipes.filter(id__gt=last_id)
+                         .values_list('id', flat=True)[:batch_size])
+            if not batch:
+                break
+            # Триггер recipes_recipe_search_vector пересчитывает вектор
+            # при любом UPDATE поля name.
+            updated += (Recipe.objects.filter(id__in=batch)
+                        .update(name=F('name')))
+            last_id = batch[-1]
+            self.stdout.write(f'Обновлено рецептов: {updated}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Поисковые векторы пересчитаны: {updated}'))
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.ingredient_index import ingredient_index
+from recipes.models import Ingredient
+
+
+class Command(BaseCommand):
+    help = 'Compare ingredient prefix search: ORM against in-memory index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=None)
+        parser.add_argument('prefixes', nargs='*',
+                            default=['а', 'ка', 'мол', 'сыр', 'яблок'])
+
+    def orm_search(self, prefix, limit):
+        queryset = (Ingredient.objects
+                    .filter(name__istartswith=prefix)
+                    .values('id', 'name', 'measurement_unit'))
+        if limit is not None:
+            queryset = queryset[:limit]
+        return list(queryset)
+
+    def measure(self, search, prefix, limit, iterations):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            found = search(prefix, limit)
+        elapsed = time.perf_counter() - started
+        return elapsed / iterations * 1_000_000, len(found)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        limit = options['limit']
+        ingredient_index.search('')
+
+        self.stdout.write(f"{'prefix':<12}{'rows':>8}{'orm, µs':>14}"
+                          f"{'index, µs':>14}{'speedup':>10}")
+        for prefix in options['prefixes']:
+            orm_time, rows = self.measure(self.orm_search, prefix, limit,
+                                          iterations)
+            index_time, _ = self.measure(ingredient_index.search, prefix,
+                                         limit, iterations)
+            self.stdout.write(
+                f'{prefix:<12}{rows:>8}{orm_time:>14.1f}{index_time:>14.1f}'
+                f'{orm_time / index_time:>9.1f}x'
+            )
@@ -0,0 +1,233 @@
+import io
+import itertools
+import json
+import os
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from PIL import Image
+
+from api.authentication import evict_users
+from api.conditional import bump_recipes_generation, bump_users_generation
+from api.membership import reset_memberships
+from recipes.constants import RECIPE_IMAGE_UPLOAD_PATH
+from recipes.ingredient_index import ingredient_index
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart)
+from recipes.recipe_ids import recipe_ids
+from users.models import Subscription
+
+User = get_user_model()
+
+SHARED_IMAGE_NAME = f'{RECIPE_IMAGE_UPLOAD_PATH}load_data.png'
+
+
+class ZipfSampler:
+    # Вес элемента с рангом k пропорционален 1 / k^s: несколько рецептов
+    # и авторов собирают большую часть лайков, как на живом сайте.
+
+    def __init__(self, rng, items, exponent):
+        self.rng = rng
+        self.items = list(items)
+        rng.shuffle(self.items)
+        self.cum_weights = list(itertools.accumulate(
+            1 / rank ** exponent for rank in range(1, len(self.items) + 1)))
+
+    def sample(self, k):
+        return self.rng.choices(self.items, cum_weights=self.cum_weights,
+                                k=k)
+
+
+class Command(BaseCommand):
+    help = 'Generate a large deterministic dataset for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--recipes', type=int, default=100_000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=6)
+        parser.add_argument('--favorites', type=int, default=200_000)
+        parser.add_argument('--cart', type=int, default=50_000)
+        parser.add_argument('--subscriptions', type=int, default=50_000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--zipf', type=float, default=1.1,
+                            help='Показатель распределения популярности')
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--prefix', default='load',
+                            help='Префикс имён и почт пользователей')
+        parser.add_argument('--password', default='load-password')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.zipf = options['zipf']
+        started = time.monotonic()
+
+        ingredient_ids = self.ensure_ingredients()
+        if options['ingredients_per_recipe'] > len(ingredient_ids):
+            raise CommandError('Ингредиентов меньше, чем нужно на рецепт.')
+
+        user_ids = self.create_users(options['users'], options['prefix'],
+                                     options['password'])
+        recipe_ids_list = self.create_recipes(options['recipes'], user_ids)
+        self.create_recipe_ingredients(recipe_ids_list, ingredient_ids,
+                                       options['ingredients_per_recipe'])
+
+        recipes = ZipfSampler(self.rng, recipe_ids_list, self.zipf)
+        authors = ZipfSampler(self.rng, user_ids, self.zipf)
+        self.create_links(Favorite, 'recipe', user_ids, recipes,
+                          options['favorites'])
+        self.create_links(ShoppingCart, 'recipe', user_ids, recipes,
+                          options['cart'])
+        self.create_links(Subscription, 'author', user_ids, authors,
+                          options['subscriptions'], allow_self=False)
+
+        call_command('reconcile_counters', batch_size=self.batch_size,
+                     stdout=self.stdout)
+        # bulk_create и COPY обходят сигналы, поэтому кеши сбрасываются
+        # здесь.
+        recipe_ids.invalidate()
+        ingredient_index.invalidate()
+        bump_recipes_generation()
+        bump_users_generation()
+        for batch in self.batches(user_ids):
+            reset_memberships(batch)
+            evict_users(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.1f} с'))
+
+    def log(self, message):
+        self.stdout.write(message)
+        self.stdout.flush()
+
+    def batches(self, items):
+        iterator = iter(items)
+        while batch := list(itertools.islice(iterator, self.batch_size)):
+            yield batch
+
+    def ensure_ingredients(self):
+        if not Ingredient.objects.exists():
+            base_dir = os.path.dirname(os.path.dirname(
+                os.path.dirname(os.path.abspath(__file__))))
+            json_path = os.path.join(base_dir, 'data', 'ingredients.json')
+            with open(json_path, encoding='utf-8') as f:
+                data = json.load(f)
+            Ingredient.objects.bulk_create(
+                [Ingredient(**item) for item in data],
+                batch_size=self.batch_size, ignore_conflicts=True)
+        return list(Ingredient.objects.order_by('id')
+                    .values_list('id', flat=True))
+
+    def create_users(self, count, prefix, password):
+        # Хеш считается один раз: PBKDF2 на каждого пользователя занял бы
+        # часы, а для нагрузочных данных одинаковая соль не важна.
+        password_hash = make_password(password)
+        users = (
+            User(username=f'{prefix}_{i}', email=f'{prefix}_{i}@example.com',
+                 first_name=f'Имя{i}', last_name=f'Фамилия{i}',
+                 password=password_hash)
+            for i in range(count)
+        )
+        user_ids = []
+        for batch in self.batches(users):
+            created = User.objects.bulk_create(batch)
+            user_ids.extend(user.pk for user in created)
+        self.log(f'Пользователей: {len(user_ids)}')
+        return user_ids
+
+    def get_shared_image(self):
+        if not default_storage.exists(SHARED_IMAGE_NAME):
+            file = io.BytesIO()
+            Image.new('RGB', (300, 300), color='grey').save(file, 'png')
+            default_storage.save(SHARED_IMAGE_NAME,
+                                 ContentFile(file.getvalue()))
+        return SHARED_IMAGE_NAME
+
+    def reserve_ids(self, model, count):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT nextval(pg_get_serial_sequence(%s, %s)) '
+                'FROM generate_series(1, %s)',
+                [model._meta.db_table, model._meta.pk.column, count]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def copy_rows(self, model, columns, rows):
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write('\t'.join(map(str, row)))
+            buffer.write('\n')
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {model._meta.db_table} ({", ".join(columns)}) '
+                f'FROM STDIN',
+                buffer
+            )
+
+    def create_recipes(self, count, user_ids):
+        # Идентификаторы берутся из последовательности заранее, поэтому
+        # рецепты можно грузить через COPY и не ждать их от bulk_create.
+        image = self.get_shared_image()
+        authors = ZipfSampler(self.rng, user_ids, self.zipf)
+        recipe_ids_list = []
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            ids = self.reserve_ids(Recipe, size)
+            self.copy_rows(
+                Recipe,
+                ('id', 'author_id', 'name', 'text', 'cooking_time', 'image',
+                 'updated_at', 'favorites_count', 'in_cart_count'),
+                ((pk, author_id, f'Рецепт {pk}', f'Описание рецепта {pk}',
+                  self.rng.randint(1, 180), image, 'now', 0, 0)
+                 for pk, author_id in zip(ids, authors.sample(size)))
+            )
+            recipe_ids_list.extend(ids)
+            self.log(f'Рецептов: {len(recipe_ids_list)}')
+        return recipe_ids_list
+
+    def create_recipe_ingredients(self, recipe_ids_list, ingredient_ids,
+                                  per_recipe):
+        ingredients = ZipfSampler(self.rng, ingredient_ids, self.zipf)
+        written = 0
+        for batch in self.batches(recipe_ids_list):
+            rows = []
+            for recipe_id in batch:
+                chosen = set()
+                while len(chosen) < per_recipe:
+                    chosen.update(ingredients.sample(per_recipe - len(chosen)))
+                rows.extend((recipe_id, ingredient_id,
+                             self.rng.randint(1, 500))
+                            for ingredient_id in chosen)
+            self.copy_rows(RecipeIngredient,
+                           ('recipe_id', 'ingredient_id', 'amount'), rows)
+            written += len(rows)
+            self.log(f'Ингредиентов в рецептах: {written}')
+
+    def create_links(self, model, field, user_ids, targets, count,
+                     allow_self=True):
+        users = ZipfSampler(self.rng, user_ids, self.zipf)
+        target_column = model._meta.get_field(field).attname
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            pairs = {
+                (user_id, target_id)
+                for user_id, target_id in zip(users.sample(size),
+                                              targets.sample(size))
+                if allow_self or user_id != target_id
+            }
+            model.objects.bulk_create(
+                [model(user_id=user_id, **{target_column: target_id})
+                 for user_id, target_id in pairs],
+                ignore_conflicts=True
+            )
+        # Повторы отбрасываются уникальным индексом, поэтому строк
+        # может получиться чуть меньше, чем запрошено.
+        self.log(f'{model._meta.verbose_name_plural}: '
+                 f'{model.objects.count()}')
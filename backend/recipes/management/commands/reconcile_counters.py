@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription
+
+User = get_user_model()
+
+
+def count_of(model, field):
+    counts = (model.objects
+              .filter(**{field: OuterRef('pk')})
+              .order_by()
+              .values(field)
+              .annotate(total=Count('pk'))
+              .values('total'))
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalised favourite, cart, recipe and ' \
+           'subscriber counters in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        counters = (
+            (Recipe, 'favorites_count', count_of(Favorite, 'recipe')),
+            (Recipe, 'in_cart_count', count_of(ShoppingCart, 'recipe')),
+            (User, 'recipes_count', count_of(Recipe, 'author')),
+            (User, 'subscribers_count', count_of(Subscription, 'author')),
+        )
+        for model, field, actual in counters:
+            fixed = self.reconcile(model, field, actual,
+                                   options['batch_size'])
+            self.stdout.write(
+                f'{model._meta.label}.{field}: исправлено {fixed}')
+
+        self.stdout.write(self.style.SUCCESS('Счётчики пересчитаны'))
+
+    def reconcile(self, model, field, actual, batch_size):
+        objects = model.objects.order_by('id')
+        last_id = 0
+        fixed = 0
+        while True:
+            batch = list(objects.filter(id__gt=last_id)
+                         .values_list('id', flat=True)[:batch_size])
+            if not batch:
+                break
+            # Пересчёт и запись идут одним UPDATE, поэтому инкременты,
+            # выполненные до него, не теряются.
+            fixed += (model.objects
+                      .filter(~Q(**{field: actual}), id__in=batch)
+                      .update(**{field: actual}))
+            last_id = batch[-1]
+        return fixed
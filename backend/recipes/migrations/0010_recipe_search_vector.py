@@ -0,0 +1,102 @@
+# Generated by Django 5.2.1 on 2026-10-18 04:53
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+CREATE FUNCTION recipes_recipe_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A')
+        || setweight(to_tsvector('russian', coalesce(NEW.text, '')), 'B')
+        || setweight(to_tsvector('russian', coalesce((
+            SELECT string_agg(ingredient.name, ' ')
+            FROM recipes_recipeingredient AS link
+            JOIN recipes_ingredient AS ingredient
+                ON ingredient.id = link.ingredient_id
+            WHERE link.recipe_id = NEW.id
+        ), '')), 'C');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER recipes_recipe_search_vector
+BEFORE INSERT OR UPDATE OF name, text ON recipes_recipe
+FOR EACH ROW EXECUTE FUNCTION recipes_recipe_search_vector();
+
+CREATE FUNCTION recipes_recipeingredient_search_vector() RETURNS trigger AS $$
+BEGIN
+    UPDATE recipes_recipe SET name = name
+    WHERE id IN (SELECT DISTINCT recipe_id FROM changed_rows);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER recipes_recipeingredient_search_vector_insert
+AFTER INSERT ON recipes_recipeingredient
+REFERENCING NEW TABLE AS changed_rows
+FOR EACH STATEMENT EXECUTE FUNCTION recipes_recipeingredient_search_vector();
+
+CREATE TRIGGER recipes_recipeingredient_search_vector_update
+AFTER UPDATE ON recipes_recipeingredient
+REFERENCING NEW TABLE AS changed_rows
+FOR EACH STATEMENT EXECUTE FUNCTION recipes_recipeingredient_search_vector();
+
+CREATE TRIGGER recipes_recipeingredient_search_vector_delete
+AFTER DELETE ON recipes_recipeingredient
+REFERENCING OLD TABLE AS changed_rows
+FOR EACH STATEMENT EXECUTE FUNCTION recipes_recipeingredient_search_vector();
+
+CREATE FUNCTION recipes_ingredient_search_vector() RETURNS trigger AS $$
+BEGIN
+    UPDATE recipes_recipe SET name = name
+    WHERE id IN (
+        SELECT recipe_id FROM recipes_recipeingredient
+        WHERE ingredient_id = NEW.id
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER recipes_ingredient_search_vector
+AFTER UPDATE OF name ON recipes_ingredient
+FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+EXECUTE FUNCTION recipes_ingredient_search_vector();
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP TRIGGER recipes_ingredient_search_vector ON recipes_ingredient;
+DROP FUNCTION recipes_ingredient_search_vector();
+DROP TRIGGER recipes_recipeingredient_search_vector_insert
+    ON recipes_recipeingredient;
+DROP TRIGGER recipes_recipeingredient_search_vector_update
+    ON recipes_recipeingredient;
+DROP TRIGGER recipes_recipeingredient_search_vector_delete
+    ON recipes_recipeingredient;
+DROP FUNCTION recipes_recipeingredient_search_vector();
+DROP TRIGGER recipes_recipe_search_vector ON recipes_recipe;
+DROP FUNCTION recipes_recipe_search_vector();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_alter_recipeingredient_amount'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='recipe_search_vector_idx'),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_SQL, DROP_SEARCH_VECTOR_SQL),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.1 on 2026-10-18 04:58
+
+from django.db import migrations, models
+
+TOUCH_RECIPE_SQL = """
+CREATE OR REPLACE FUNCTION recipes_recipeingredient_search_vector()
+RETURNS trigger AS $$
+BEGIN
+    UPDATE recipes_recipe SET name = name, updated_at = now()
+    WHERE id IN (SELECT DISTINCT recipe_id FROM changed_rows);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION recipes_ingredient_search_vector()
+RETURNS trigger AS $$
+BEGIN
+    UPDATE recipes_recipe SET name = name, updated_at = now()
+    WHERE id IN (
+        SELECT recipe_id FROM recipes_recipeingredient
+        WHERE ingredient_id = NEW.id
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+UNTOUCH_RECIPE_SQL = """
+CREATE OR REPLACE FUNCTION recipes_recipeingredient_search_vector()
+RETURNS trigger AS $$
+BEGIN
+    UPDATE recipes_recipe SET name = name
+    WHERE id IN (SELECT DISTINCT recipe_id FROM changed_rows);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION recipes_ingredient_search_vector()
+RETURNS trigger AS $$
+BEGIN
+    UPDATE recipes_recipe SET name = name
+    WHERE id IN (
+        SELECT recipe_id FROM recipes_recipeingredient
+        WHERE ingredient_id = NEW.id
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.RunSQL(TOUCH_RECIPE_SQL, UNTOUCH_RECIPE_SQL),
+    ]
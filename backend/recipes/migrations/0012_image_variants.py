@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 05:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_small',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='recipes/', verbose_name='Миниатюра'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image_webp',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='recipes/', verbose_name='Изображение WebP'),
+        ),
+    ]
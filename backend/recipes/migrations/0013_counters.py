@@ -0,0 +1,48 @@
+# Generated by Django 5.2.1 on 2026-10-18 05:04
+
+from django.db import migrations, models
+
+FILL_COUNTERS_SQL = """
+UPDATE recipes_recipe SET favorites_count = counts.total
+FROM (
+    SELECT recipe_id, COUNT(*) AS total
+    FROM recipes_favorite GROUP BY recipe_id
+) AS counts
+WHERE recipes_recipe.id = counts.recipe_id;
+
+UPDATE recipes_recipe SET in_cart_count = counts.total
+FROM (
+    SELECT recipe_id, COUNT(*) AS total
+    FROM recipes_shoppingcart GROUP BY recipe_id
+) AS counts
+WHERE recipes_recipe.id = counts.recipe_id;
+
+UPDATE users_user SET recipes_count = counts.total
+FROM (
+    SELECT author_id, COUNT(*) AS total
+    FROM recipes_recipe GROUP BY author_id
+) AS counts
+WHERE users_user.id = counts.author_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_image_variants'),
+        ('users', '0006_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_cart_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В списках покупок'),
+        ),
+        migrations.RunSQL(FILL_COUNTERS_SQL, migrations.RunSQL.noop),
+    ]
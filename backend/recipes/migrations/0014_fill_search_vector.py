@@ -0,0 +1,19 @@
+from django.db import migrations
+
+# Триггер recipes_recipe_search_vector пересчитывает вектор при UPDATE
+# поля name, поэтому для рецептов, созданных до 0010, хватает пустого
+# обновления.
+FILL_SEARCH_VECTOR_SQL = """
+UPDATE recipes_recipe SET name = name WHERE search_vector IS NULL;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_counters'),
+    ]
+
+    operations = [
+        migrations.RunSQL(FILL_SEARCH_VECTOR_SQL, migrations.RunSQL.noop),
+    ]
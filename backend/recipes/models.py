@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
@@ -16,10 +18,17 @@ from .constants import (
     RECIPE_FIELD_AUTHOR,
     RECIPE_FIELD_NAME,
     RECIPE_FIELD_IMAGE,
+    RECIPE_FIELD_IMAGE_SMALL,
+    RECIPE_FIELD_IMAGE_WEBP,
     RECIPE_FIELD_TEXT,
     RECIPE_FIELD_COOKING_TIME,
     RECIPE_FIELD_COOKING_TIME_HELP,
     RECIPE_FIELD_INGREDIENTS,
+    RECIPE_FIELD_SEARCH_VECTOR,
+    RECIPE_FIELD_UPDATED_AT,
+    RECIPE_FIELD_FAVORITES_COUNT,
+    RECIPE_FIELD_IN_CART_COUNT,
+    RECIPE_SEARCH_INDEX_NAME,
 
     INGREDIENT_VERBOSE_NAME,
     INGREDIENT_VERBOSE_NAME_PLURAL,
@@ -62,6 +71,20 @@ class Recipe(models.Model):
         upload_to=RECIPE_IMAGE_UPLOAD_PATH,
         verbose_name=RECIPE_FIELD_IMAGE
     )
+    image_small = models.ImageField(
+        upload_to=RECIPE_IMAGE_UPLOAD_PATH,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name=RECIPE_FIELD_IMAGE_SMALL
+    )
+    image_webp = models.ImageField(
+        upload_to=RECIPE_IMAGE_UPLOAD_PATH,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name=RECIPE_FIELD_IMAGE_WEBP
+    )
     text = models.TextField(
         verbose_name=RECIPE_FIELD_TEXT
     )
@@ -75,8 +98,30 @@ class Recipe(models.Model):
         related_name='recipes',
         verbose_name=RECIPE_FIELD_INGREDIENTS
     )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name=RECIPE_FIELD_SEARCH_VECTOR
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name=RECIPE_FIELD_UPDATED_AT
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name=RECIPE_FIELD_FAVORITES_COUNT
+    )
+    in_cart_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name=RECIPE_FIELD_IN_CART_COUNT
+    )
 
     class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name=RECIPE_SEARCH_INDEX_NAME)
+        ]
         ordering = RECIPE_ORDERING
         verbose_name = RECIPE_VERBOSE_NAME
         verbose_name_plural = RECIPE_VERBOSE_NAME_PLURAL
@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Max
+
+from .constants import (RECIPE_IDS_VERSION_KEY, RECIPE_IDS_TTL,
+                        RECIPE_IDS_UPPER_BOUND_KEY,
+                        RECIPE_IDS_UPPER_BOUND_TTL)
+from .models import Recipe
+from .snapshots import VersionedSnapshot
+
+
+class RecipeIdBitmap(VersionedSnapshot):
+    # Один бит на идентификатор: миллион рецептов занимает около 125 КБ.
+    version_key = RECIPE_IDS_VERSION_KEY
+    ttl = RECIPE_IDS_TTL
+    empty = (b'', 0)
+
+    def __contains__(self, pk):
+        bits, max_id = self._get_data()
+        if pk > max_id:
+            # Рецепт мог появиться после сборки карты (в том числе в другом
+            # процессе), поэтому о новых идентификаторах спрашиваем базу,
+            # но только до известного наибольшего идентификатора.
+            return (pk <= self.upper_bound()
+                    and Recipe.objects.filter(pk=pk).exists())
+        index, offset = divmod(pk, 8)
+        return index >= 0 and bool(bits[index] & (1 << offset))
+
+    def upper_bound(self):
+        return cache.get_or_set(
+            RECIPE_IDS_UPPER_BOUND_KEY,
+            lambda: (Recipe.objects.using(DEFAULT_DB_ALIAS)
+                     .aggregate(max_id=Max('id'))['max_id'] or 0),
+            RECIPE_IDS_UPPER_BOUND_TTL)
+
+    def invalidate(self):
+        cache.delete(RECIPE_IDS_UPPER_BOUND_KEY)
+        super().invalidate()
+
+    def load(self):
+        ids = (Recipe.objects.using(DEFAULT_DB_ALIAS).order_by('-id')
+               .values_list('id', flat=True))
+        bits, max_id = bytearray(), 0
+        for pk in ids.iterator():
+            # Идентификаторы идут по убыванию, поэтому первый задаёт размер.
+            if not bits:
+                bits, max_id = bytearray(pk // 8 + 1), pk
+            bits[pk // 8] |= 1 << (pk % 8)
+        return bits, max_id
+
+
+recipe_ids = RecipeIdBitmap()
@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .counters import change_counters
+from .ingredient_index import ingredient_index
+from .models import Ingredient, Recipe
+from .recipe_ids import recipe_ids
+
+User = get_user_model()
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    transaction.on_commit(ingredient_index.invalidate)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    if created:
+        change_counters(User, instance.author_id, recipes_count=1)
+        transaction.on_commit(recipe_ids.invalidate)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    change_counters(User, instance.author_id, recipes_count=-1)
+    transaction.on_commit(recipe_ids.invalidate)
@@ -0,0 +1,60 @@
+import threading
+import time
+
+from django.core.cache import cache
+
+
+def get_cached_version(key):
+    # Начальная версия берётся из часов: после вытеснения ключа из кеша
+    # новая версия не совпадёт с версией уже собранного снимка.
+    return cache.get_or_set(key, time.time_ns, None)
+
+
+def bump_cached_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(key, version, None)
+        return version
+
+
+class VersionedSnapshot:
+    """Данные в памяти процесса, пересобираемые при смене версии в кеше."""
+
+    version_key = None
+    ttl = None
+    empty = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = self.empty
+        self._version = None
+        self._built_at = 0.0
+
+    def load(self):
+        # Снимок живёт до смены версии, поэтому собирается по основной
+        # базе: отстающая реплика закрепила бы в нём старые данные.
+        raise NotImplementedError
+
+    def invalidate(self):
+        bump_cached_version(self.version_key)
+        self._version = None
+
+    def _get_data(self):
+        version = get_cached_version(self.version_key)
+        if self._is_fresh(version):
+            return self._data
+        with self._lock:
+            if not self._is_fresh(version):
+                self._build(version)
+        return self._data
+
+    def _is_fresh(self, version):
+        return (self._version == version
+                and time.monotonic() - self._built_at < self.ttl)
+
+    def _build(self, version):
+        self._data = self.load()
+        self._version = version
+        self._built_at = time.monotonic()
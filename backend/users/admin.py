@@ -7,7 +7,7 @@ from .models import User, Subscription
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
     list_display = ('email', 'username', 'first_name', 'last_name', 'is_staff',
-                    'is_active')
+                    'is_active', 'recipes_count', 'subscribers_count')
     search_fields = ('email', 'username')
     ordering = ('email',)
     fieldsets = (
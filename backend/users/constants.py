@@ -17,6 +17,12 @@ NAME_MAX_LENGTH = 150
 
 AVATAR_UPLOAD_PATH = 'users/avatars/'
 AVATAR_VERBOSE_NAME = 'Аватар'
+AVATAR_SMALL_VERBOSE_NAME = 'Миниатюра аватара'
+AVATAR_WEBP_VERBOSE_NAME = 'Аватар WebP'
+AVATAR_THUMBNAIL_SIZE = (96, 96)
+UPDATED_AT_VERBOSE_NAME = 'Дата изменения'
+RECIPES_COUNT_VERBOSE_NAME = 'Рецептов'
+SUBSCRIBERS_COUNT_VERBOSE_NAME = 'Подписчиков'
 
 SUBSCRIBER_VERBOSE_NAME = 'Подписчик'
 AUTHOR_VERBOSE_NAME = 'Автор'
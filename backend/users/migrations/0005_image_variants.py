@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 05:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='avatar_small',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='users/avatars/', verbose_name='Миниатюра аватара'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='avatar_webp',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='users/avatars/', verbose_name='Аватар WebP'),
+        ),
+    ]
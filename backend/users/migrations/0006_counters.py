@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 05:04
+
+from django.db import migrations, models
+
+FILL_SUBSCRIBERS_COUNT_SQL = """
+UPDATE users_user SET subscribers_count = counts.total
+FROM (
+    SELECT author_id, COUNT(*) AS total
+    FROM users_subscription GROUP BY author_id
+) AS counts
+WHERE users_user.id = counts.author_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Рецептов'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='subscribers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Подписчиков'),
+        ),
+        migrations.RunSQL(FILL_SUBSCRIBERS_COUNT_SQL, migrations.RunSQL.noop),
+    ]
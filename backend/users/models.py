@@ -4,7 +4,9 @@ from .constants import (
     EMAIL_MAX_LENGTH, EMAIL_VALIDATOR, EMAIL_VERBOSE_NAME,
     USERNAME_MAX_LENGTH, USERNAME_UNIQUE_VALIDATOR, USERNAME_VERBOSE_NAME,
     FIRST_NAME_VERBOSE_NAME, LAST_NAME_VERBOSE_NAME, NAME_MAX_LENGTH,
-    AVATAR_UPLOAD_PATH, AVATAR_VERBOSE_NAME,
+    AVATAR_UPLOAD_PATH, AVATAR_VERBOSE_NAME, UPDATED_AT_VERBOSE_NAME,
+    AVATAR_SMALL_VERBOSE_NAME, AVATAR_WEBP_VERBOSE_NAME,
+    RECIPES_COUNT_VERBOSE_NAME, SUBSCRIBERS_COUNT_VERBOSE_NAME,
     SUBSCRIBER_VERBOSE_NAME, AUTHOR_VERBOSE_NAME,
     SUBSCRIPTION_VERBOSE_NAME, SUBSCRIPTION_VERBOSE_NAME_PLURAL,
     PREVENT_SELF_SUBSCRIPTION_NAME, UNIQUE_SUBSCRIPTION_NAME,
@@ -40,10 +42,46 @@ class User(AbstractUser):
         null=True,
         verbose_name=AVATAR_VERBOSE_NAME
     )
+    avatar_small = models.ImageField(
+        upload_to=AVATAR_UPLOAD_PATH,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name=AVATAR_SMALL_VERBOSE_NAME
+    )
+    avatar_webp = models.ImageField(
+        upload_to=AVATAR_UPLOAD_PATH,
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name=AVATAR_WEBP_VERBOSE_NAME
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name=UPDATED_AT_VERBOSE_NAME
+    )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name=RECIPES_COUNT_VERBOSE_NAME
+    )
+    subscribers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name=SUBSCRIBERS_COUNT_VERBOSE_NAME
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Значения из БД нужны сигналам, чтобы понять, изменились ли
+        # публичные поля пользователя.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     class Meta:
         verbose_name = USER_VERBOSE_NAME
         verbose_name_plural = USER_VERBOSE_NAME_PLURAL